@@ -1,10 +1,24 @@
 import dash
 from dash import dcc, html, Input, Output, State
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import os
+import functools
+import threading
+import flask
+from concurrent.futures import ThreadPoolExecutor
+
+from data_loader import load_sales_data, add_month_column, artifact_path
+from shared_data import attach, current_version
+from result_cache import ResultCache, normalize_selection
+from downsample import trend_points, GRANULARITY_LABELS
+from encoded_table import EncodedTable
+from dataset import Dataset, DatasetHolder
+from exports import ExportService
+from selection import AGGREGATION_WORKERS
+from instrumentation import metrics
+import figures
 
 # Initialize app with a modern theme
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.SLATE], meta_tags=[
@@ -87,15 +101,119 @@ app.index_string = '''
 '''
 
 # Load Data
-DATA_PATH = os.path.join(os.path.dirname(__file__), 'cleaned_data', 'cleaned_Amazon-Sale-Report.csv')
+DATA_PATH = os.environ.get('SALES_DATA_PATH') or os.path.join(
+    os.path.dirname(__file__), 'cleaned_data', 'cleaned_Amazon-Sale-Report.csv')
+# Set to a directory filled by `python shared_data.py publish` to map the
+# dataset zero-copy instead of loading a private copy per worker
+SHARED_DATA_DIR = os.environ.get('SHARED_DATA_DIR')
+
+
+# Seconds between checks for new data (0 turns live reloading off)
+DATA_RELOAD_SECONDS = float(os.environ.get('DATA_RELOAD_SECONDS', 10))
+
+
+def data_version():
+    # Identifies the data a worker has loaded; cached results are tied to it
+    if SHARED_DATA_DIR:
+        return current_version(SHARED_DATA_DIR)
+    try:
+        stat = os.stat(DATA_PATH)
+    except OSError:
+        return None
+    version = f"{stat.st_size}-{stat.st_mtime_ns}"
+    # A rebuilt artifact counts as a new version too, so it gets picked up
+    try:
+        artifact = os.stat(artifact_path(DATA_PATH))
+        version += f"-{artifact.st_mtime_ns}"
+    except OSError:
+        pass
+    return version
+
+
+def load_sales(version):
+    if SHARED_DATA_DIR:
+        # Published already encoded: the worker maps the arrays as they are
+        with metrics.stage('load_data'):
+            return attach(SHARED_DATA_DIR, version)
+    with metrics.stage('load_data'):
+        df = load_sales_data(DATA_PATH)
+        add_month_column(df)
+    # Text columns as integer codes into shared lookup tables, Amount as
+    # float64 and Date as day numbers; the loaded frame is dropped afterwards
+    with metrics.stage('encode'):
+        return EncodedTable.from_frame(df)
+
+
+# Cube slices (and their aggregations) shared by the callbacks of one click;
+# every dataset version gets its own memo, all on one aggregation pool
+SELECTION_CACHE_MB = float(os.environ.get('SELECTION_CACHE_MB', 32))
+aggregation_pool = ThreadPoolExecutor(max_workers=AGGREGATION_WORKERS, thread_name_prefix='aggregate')
+
+
+def load_dataset(version):
+    """Load and index one data version: at startup, then on the reload thread."""
+    return Dataset(version, load_sales(version), int(SELECTION_CACHE_MB * 1024 * 1024), aggregation_pool)
+
+
+# Rendered KPIs and figures per output and normalized filter selection
+RESULT_CACHE_MB = float(os.environ.get('RESULT_CACHE_MB', 64))
+result_cache = ResultCache(int(RESULT_CACHE_MB * 1024 * 1024))
+
+
+def dataset_swapped(dataset):
+    result_cache.set_version(dataset.version)
+    if metrics.enabled:
+        metrics.set_gauge('eah_dataset_rows', len(dataset.sales))
+        metrics.set_gauge('eah_dataset_bytes', dataset.sales.nbytes)
+        metrics.set_gauge('eah_cube_rows', len(dataset.cube))
+        metrics.set_gauge('eah_dataset_reloads', datasets.reloads)
 
-try:
-    df = pd.read_csv(DATA_PATH, low_memory=False)
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df['Month'] = df['Date'].dt.to_period('M').astype(str)
-except Exception as e:
-    print(f"Error loading data: {e}")
-    df = pd.DataFrame(columns=['Date', 'Amount', 'Category', 'ship-state', 'Month', 'Status'])
+
+def empty_dataset(version):
+    # Stands in when the data can't be loaded, so the dashboard still comes up
+    empty = pd.DataFrame(columns=['Date', 'Amount', 'Category', 'ship-state', 'Month', 'Status'])
+    return Dataset(version, EncodedTable.from_frame(empty), 0, aggregation_pool)
+
+
+# The live dataset; callbacks take `datasets.current` once per call. The
+# first version loads on the reload thread, so importing the app doesn't
+# wait for it; set PRELOAD_DATA=1 to load it here instead (e.g. under
+# `gunicorn --preload`, to load once before forking the workers)
+datasets = DatasetHolder(load_dataset, data_version, empty_dataset, on_swap=dataset_swapped)
+PRELOAD_DATA = os.environ.get('PRELOAD_DATA') == '1'
+if PRELOAD_DATA:
+    datasets.load_initial()
+# A preloading gunicorn master never serves requests: only the workers it
+# forks watch for new data
+datasets.start(DATA_RELOAD_SECONDS, in_children=PRELOAD_DATA)
+# Chart skeletons are built on first use; build them off the request path.
+# A preloading master builds them before it forks: a fork while a thread is
+# importing plotly would leave the import lock held in the worker
+if PRELOAD_DATA:
+    figures.warm_up()
+else:
+    threading.Thread(target=figures.warm_up, name='figure-warm-up', daemon=True).start()
+
+
+# Row extracts and deep-dive reports for a filter selection, built on a
+# separate thread pool and downloaded from /exports (see exports.py)
+exports = ExportService(lambda: datasets.current)
+server.register_blueprint(exports.blueprint())
+
+
+@server.route('/cache-stats')
+def cache_stats():
+    return flask.jsonify(result_cache.stats())
+
+
+# Prometheus scrape target: stage timings (with ENABLE_METRICS=1) and cache counters
+metrics.add_collector(lambda: {f'eah_result_cache_{k}': v for k, v in result_cache.stats().items()})
+metrics.instrument_server(server)
+
+
+@server.route('/metrics')
+def prometheus_metrics():
+    return flask.Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # --- Components ---
 
@@ -108,242 +226,372 @@ def create_card(title, id_value):
     )
 
 # --- Layout ---
-app.layout = dbc.Container([
+def filter_options(sales):
+    """Dropdown options for the month, category and region filters."""
+    return [[{'label': v, 'value': v} for v in sales.values(dim)] for dim in ('Month', 'Category', 'ship-state')]
+
+
+def insights_tab():
+    return dbc.Container([
     
-    html.Div([
-        html.H1("🚀 E-Commerce Analytics Hub", className="text-center main-header"),
-        html.P("Interactive Insights & Performance Metrics", className="text-center text-muted", style={'marginBottom': '40px'})
-    ]),
-
-    dbc.Tabs([
-        # TAB 1: DASHBOARD
-        dbc.Tab(label="📊 Live Dashboard", tab_id="tab-dashboard", children=[
-            html.Br(),
-            # Control Panel
-            dbc.Card([
-                dbc.CardBody([
-                     dbc.Row([
-                        dbc.Col([
-                            html.Label("📅 Filter by Month", className="fw-bold mb-2"),
-                            dcc.Dropdown(
-                                id='month-dropdown',
-                                options=[{'label': m, 'value': m} for m in sorted(df['Month'].dropna().unique())],
-                                multi=True,
-                                placeholder="All Months",
-                                className="black-dropdown"
-                            )
-                        ], md=3, sm=12),
-                        
-                        dbc.Col([
-                            html.Label("📦 Product Categories", className="fw-bold mb-2"),
-                            dcc.Dropdown(
-                                id='category-dropdown',
-                                options=[{'label': c, 'value': c} for c in sorted(df['Category'].dropna().unique())],
-                                multi=True,
-                                placeholder="All Categories"
-                            )
-                        ], md=3, sm=12),
-
-                        dbc.Col([
-                            html.Label("🌍 Regions (State)", className="fw-bold mb-2"),
-                            dcc.Dropdown(
-                                id='region-dropdown',
-                                options=[{'label': r, 'value': r} for r in sorted(df['ship-state'].dropna().unique())],
-                                multi=True,
-                                placeholder="All States"
-                            )
-                        ], md=3, sm=12),
-                        
-                         dbc.Col([
-                            html.Label("Apply Filters", className="fw-bold mb-2", style={'visibility': 'hidden'}), # Spacer
-                            dbc.Button("Update Dashboard ⚡", id="submit-button", color="primary", className="w-100", size="lg")
-                        ], md=3, sm=12, className="d-flex align-items-end")
+        # Section 1: Overall Verdict
+        dbc.Alert([
+            html.H4("📉 Overall Trend: Declining (Action Required)", className="alert-heading"),
+            html.P("Sales have peaked in April (~28.8M) and have shown a consistent decline through June (~23.4M). While revenue remains substantial, this -18% drop over 3 months suggests post-season cooling or retention issues."),
+        ], color="danger", className="mb-4"),
+
+        dbc.Row([
+            # Section 2: Reasons
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("❓ Why is this happening?", className="bg-warning text-dark fw-bold"),
+                    dbc.CardBody([
+                        html.Ul([
+                            html.Li([html.Strong("Peak Season End: "), "April was likely the start of a seasonal campaign (Summer Sale), leading to a natural dip in subsequent months."]),
+                            html.Li([html.Strong("High Cancellation Rate (~13%): "), "Over 1/10th of all orders are cancelled. This is a critical revenue leak."]),
+                            html.Li([html.Strong("Logistics Gaps: "), "Long delivery times for Merchant-fulfilled orders are driving cancellations."]),
+                            html.Li([html.Strong("Product Concentration: "), "Revenue is heavily reliable on just 2 categories (Sets & Kurtas)."])
+                        ])
+                    ])
+                ], className="h-100")
+            ], md=6),
+
+            # Section 3: Recommendations
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("🚀 Actionable Strategies", className="bg-success text-white fw-bold"),
+                    dbc.CardBody([
+                        dbc.ListGroup([
+                            dbc.ListGroupItem([
+                                html.Div([
+                                    html.H5("1. Fix Cancellations", className="mb-1"),
+                                    html.P("Audit size charts and product images. Shift effective inventory to FBA (Fulfilled by Amazon) for faster delivery.", className="mb-1 text-muted small")
+                                ])
+                            ]),
+                            dbc.ListGroupItem([
+                                html.Div([
+                                    html.H5("2. Counter-Seasonal Sales", className="mb-1"),
+                                    html.P("Launch a 'Mid-Year Clearance' in June/July to flatten the sales curve and clear slow-moving stock.", className="mb-1 text-muted small")
+                                ])
+                            ]),
+                            dbc.ListGroupItem([
+                                html.Div([
+                                    html.H5("3. Regional Ad Targeting", className="mb-1"),
+                                    html.P("Focus 80% of ad spend on top performing states (Maharashtra, Karnataka) to maximize ROI.", className="mb-1 text-muted small")
+                                ])
+                            ]),
+                        ], flush=True)
                     ])
+                ], className="h-100")
+            ], md=6),
+        ], className="mb-4"),
+
+        # Section 4: Deep Dive Data
+        dbc.Card([
+            dbc.CardHeader("📊 Key Data Points"),
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col([html.H3("13.2%"), html.Small("Cancellation Rate")], className="text-center border-end"),
+                    dbc.Col([html.H3("April"), html.Small("Peak Month")], className="text-center border-end"),
+                    dbc.Col([html.H3("Sets & Kurtas"), html.Small("Top Categories")], className="text-center"),
                 ])
-            ], className="control-panel mb-5"),
-
-            # KPIs
-            dbc.Row([
-                dbc.Col(create_card("Total Revenue", "total-sales"), md=3, sm=6),
-                dbc.Col(create_card("Total Orders", "total-orders"), md=3, sm=6),
-                dbc.Col(create_card("Avg. Order Value", "avg-order-value"), md=3, sm=6),
-                dbc.Col(create_card("Top Selling Category", "top-category"), md=3, sm=6),
-            ], className="mb-4"),
-
-            # Charts Row 1
-            dbc.Row([
-                dbc.Col(dbc.Card(dcc.Loading(dcc.Graph(id='sales-trend', config={'displayModeBar': False}))), md=8),
-                dbc.Col(dbc.Card(dcc.Loading(dcc.Graph(id='status-pie', config={'displayModeBar': False}))), md=4),
-            ]),
+            ])
+        ])
 
-            # Charts Row 2
-            dbc.Row([
-                dbc.Col(dbc.Card(dcc.Loading(dcc.Graph(id='category-bar', config={'displayModeBar': False}))), md=6),
-                dbc.Col(dbc.Card(dcc.Loading(dcc.Graph(id='region-map', config={'displayModeBar': False}))), md=6),
-            ]),
-        ]),
+    ], style={'maxWidth': '1000px'})
 
-        # TAB 2: INSIGHTS REPORT
-        dbc.Tab(label="🧠 Business Intelligence Analysis", tab_id="tab-insights", children=[
-            html.Br(),
-            dbc.Container([
-                
-                # Section 1: Overall Verdict
-                dbc.Alert([
-                    html.H4("📉 Overall Trend: Declining (Action Required)", className="alert-heading"),
-                    html.P("Sales have peaked in April (~28.8M) and have shown a consistent decline through June (~23.4M). While revenue remains substantial, this -18% drop over 3 months suggests post-season cooling or retention issues."),
-                ], color="danger", className="mb-4"),
 
-                dbc.Row([
-                    # Section 2: Reasons
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardHeader("❓ Why is this happening?", className="bg-warning text-dark fw-bold"),
-                            dbc.CardBody([
-                                html.Ul([
-                                    html.Li([html.Strong("Peak Season End: "), "April was likely the start of a seasonal campaign (Summer Sale), leading to a natural dip in subsequent months."]),
-                                    html.Li([html.Strong("High Cancellation Rate (~13%): "), "Over 1/10th of all orders are cancelled. This is a critical revenue leak."]),
-                                    html.Li([html.Strong("Logistics Gaps: "), "Long delivery times for Merchant-fulfilled orders are driving cancellations."]),
-                                    html.Li([html.Strong("Product Concentration: "), "Revenue is heavily reliable on just 2 categories (Sets & Kurtas)."])
-                                ])
-                            ])
-                        ], className="h-100")
-                    ], md=6),
-
-                    # Section 3: Recommendations
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardHeader("🚀 Actionable Strategies", className="bg-success text-white fw-bold"),
-                            dbc.CardBody([
-                                dbc.ListGroup([
-                                    dbc.ListGroupItem([
-                                        html.Div([
-                                            html.H5("1. Fix Cancellations", className="mb-1"),
-                                            html.P("Audit size charts and product images. Shift effective inventory to FBA (Fulfilled by Amazon) for faster delivery.", className="mb-1 text-muted small")
-                                        ])
-                                    ]),
-                                    dbc.ListGroupItem([
-                                        html.Div([
-                                            html.H5("2. Counter-Seasonal Sales", className="mb-1"),
-                                            html.P("Launch a 'Mid-Year Clearance' in June/July to flatten the sales curve and clear slow-moving stock.", className="mb-1 text-muted small")
-                                        ])
-                                    ]),
-                                    dbc.ListGroupItem([
-                                        html.Div([
-                                            html.H5("3. Regional Ad Targeting", className="mb-1"),
-                                            html.P("Focus 80% of ad spend on top performing states (Maharashtra, Karnataka) to maximize ROI.", className="mb-1 text-muted small")
-                                        ])
-                                    ]),
-                                ], flush=True)
-                            ])
-                        ], className="h-100")
-                    ], md=6),
-                ], className="mb-4"),
+# The layout is built on the first page load, not at import. The filter
+# options and insights tab are filled in by callbacks once the data and
+# the tab are needed.
+@functools.cache
+def serve_layout():
+    return dbc.Container([
 
-                # Section 4: Deep Dive Data
+        html.Div([
+            html.H1("🚀 E-Commerce Analytics Hub", className="text-center main-header"),
+            html.P("Interactive Insights & Performance Metrics", className="text-center text-muted", style={'marginBottom': '40px'})
+        ]),
+
+        dbc.Tabs(id='tabs', active_tab='tab-dashboard', children=[
+            # TAB 1: DASHBOARD
+            dbc.Tab(label="📊 Live Dashboard", tab_id="tab-dashboard", children=[
+                html.Br(),
+                # Control Panel
                 dbc.Card([
-                    dbc.CardHeader("📊 Key Data Points"),
                     dbc.CardBody([
-                        dbc.Row([
-                            dbc.Col([html.H3("13.2%"), html.Small("Cancellation Rate")], className="text-center border-end"),
-                            dbc.Col([html.H3("April"), html.Small("Peak Month")], className="text-center border-end"),
-                            dbc.Col([html.H3("Sets & Kurtas"), html.Small("Top Categories")], className="text-center"),
+                         dbc.Row([
+                            dbc.Col([
+                                html.Label("📅 Filter by Month", className="fw-bold mb-2"),
+                                dcc.Dropdown(
+                                    id='month-dropdown',
+                                    options=[],
+                                    multi=True,
+                                    placeholder="All Months",
+                                    className="black-dropdown"
+                                )
+                            ], md=3, sm=12),
+                        
+                            dbc.Col([
+                                html.Label("📦 Product Categories", className="fw-bold mb-2"),
+                                dcc.Dropdown(
+                                    id='category-dropdown',
+                                    options=[],
+                                    multi=True,
+                                    placeholder="All Categories"
+                                )
+                            ], md=3, sm=12),
+
+                            dbc.Col([
+                                html.Label("🌍 Regions (State)", className="fw-bold mb-2"),
+                                dcc.Dropdown(
+                                    id='region-dropdown',
+                                    options=[],
+                                    multi=True,
+                                    placeholder="All States"
+                                )
+                            ], md=3, sm=12),
+                        
+                             dbc.Col([
+                                html.Label("Apply Filters", className="fw-bold mb-2", style={'visibility': 'hidden'}), # Spacer
+                                dbc.Button("Update Dashboard ⚡", id="submit-button", color="primary", className="w-100", size="lg")
+                            ], md=3, sm=12, className="d-flex align-items-end")
                         ])
                     ])
-                ])
+                ], className="control-panel mb-5"),
 
-            ], style={'maxWidth': '1000px'})
-        ]),
-    ])
+                # KPIs
+                dbc.Row([
+                    dbc.Col(create_card("Total Revenue", "total-sales"), md=3, sm=6),
+                    dbc.Col(create_card("Total Orders", "total-orders"), md=3, sm=6),
+                    dbc.Col(create_card("Avg. Order Value", "avg-order-value"), md=3, sm=6),
+                    dbc.Col(create_card("Top Selling Category", "top-category"), md=3, sm=6),
+                ], className="mb-4"),
+
+                # Charts Row 1
+                dbc.Row([
+                    dbc.Col(dbc.Card(dcc.Loading(dcc.Graph(id='sales-trend', config={'displayModeBar': False}))), md=8),
+                    dbc.Col(dbc.Card(dcc.Loading(dcc.Graph(id='status-pie', config={'displayModeBar': False}))), md=4),
+                ]),
 
-], fluid=True, style={'padding': '30px'})
+                # Charts Row 2
+                dbc.Row([
+                    dbc.Col(dbc.Card(dcc.Loading(dcc.Graph(id='category-bar', config={'displayModeBar': False}))), md=6),
+                    dbc.Col(dbc.Card(dcc.Loading(dcc.Graph(id='region-map', config={'displayModeBar': False}))), md=6),
+                ]),
+
+                # Filters behind the charts currently shown (dropdowns may have changed since)
+                dcc.Store(id='applied-filters'),
+                # Data version the dropdown options were built from; filled on page load, re-checked on every tick
+                dcc.Store(id='data-version'),
+                dcc.Interval(id='data-refresh', interval=max(DATA_RELOAD_SECONDS, 1) * 1000,
+                             disabled=not DATA_RELOAD_SECONDS),
+            ]),
+
+            # TAB 2: INSIGHTS REPORT
+            dbc.Tab(label="🧠 Business Intelligence Analysis", tab_id="tab-insights", children=[
+                html.Br(),
+                # Rendered by render_insights the first time the tab is opened
+                html.Div(id='insights-content'),
+            ]),
+        ])
+
+    ], fluid=True, style={'padding': '30px'})
+
+
+app.layout = serve_layout
 
 
 # --- Callbacks ---
+# The KPIs and each figure are separate callbacks on the same trigger, so
+# the browser requests them in parallel and the KPIs (the cheapest) show
+# up first instead of waiting for the slowest chart.
+
+@app.callback(
+    [Output('month-dropdown', 'options'),
+     Output('category-dropdown', 'options'),
+     Output('region-dropdown', 'options'),
+     Output('data-version', 'data')],
+    [Input('data-refresh', 'n_intervals')],
+    [State('data-version', 'data')]
+)
+def refresh_filter_options(n_intervals, shown_version):
+    # Pick up the values of a reloaded dataset; the selected values are kept
+    data = datasets.current
+    if data.version == shown_version:
+        raise PreventUpdate
+    return (*filter_options(data.sales), data.version)
+
+
+
+@app.callback(
+    Output('insights-content', 'children'),
+    [Input('tabs', 'active_tab')],
+    [State('insights-content', 'children')]
+)
+def render_insights(active_tab, rendered):
+    if active_tab != 'tab-insights' or rendered:
+        raise PreventUpdate
+    return insights_tab()
+
+FILTER_STATES = [State('month-dropdown', 'value'),
+                 State('category-dropdown', 'value'),
+                 State('region-dropdown', 'value')]
+
+
 @app.callback(
     [Output('total-sales', 'children'),
      Output('total-orders', 'children'),
      Output('avg-order-value', 'children'),
      Output('top-category', 'children'),
-     Output('sales-trend', 'figure'),
-     Output('category-bar', 'figure'),
-     Output('status-pie', 'figure'),
-     Output('region-map', 'figure')],
+     Output('applied-filters', 'data')],
     [Input('submit-button', 'n_clicks')],
-    [State('month-dropdown', 'value'),
-     State('category-dropdown', 'value'),
-     State('region-dropdown', 'value')]
+    FILTER_STATES
 )
-def update_dashboard(n_clicks, selected_months, selected_categories, selected_regions):
+@metrics.instrument('update_kpis')
+def update_kpis(n_clicks, selected_months, selected_categories, selected_regions):
     # Default to showing everything on first load
     # Triggers on load because n_clicks is None (or 0) initially? 
     # Actually Dash triggers initial call with None.
-    
-    filtered_df = df.copy()
-    
-    if selected_months:
-        filtered_df = filtered_df[filtered_df['Month'].isin(selected_months)]
-    if selected_categories:
-        filtered_df = filtered_df[filtered_df['Category'].isin(selected_categories)]
-    if selected_regions:
-        filtered_df = filtered_df[filtered_df['ship-state'].isin(selected_regions)]
-        
-    # KPIs
-    total_sales = filtered_df['Amount'].sum()
-    total_orders = len(filtered_df)
-    avg_order = total_sales / total_orders if total_orders > 0 else 0
-    top_cat = filtered_df['Category'].mode()[0] if not filtered_df.empty else "N/A"
-    
-    # Common Template
-    template = "plotly_dark"
-
-    # 1. Sales Trend
-    if not filtered_df.empty:
-        daily_sales = filtered_df.groupby('Date')['Amount'].sum().reset_index()
-        fig_trend = px.line(daily_sales, x='Date', y='Amount', title='Daily Sales Trend', template=template)
-        fig_trend.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'))
-        fig_trend.update_traces(line=dict(color='#00d2ff', width=3))
-    else:
-        fig_trend = px.line(title='No Data', template=template)
-
-    # 2. Category Bar
-    if not filtered_df.empty:
-        cat_sales = filtered_df.groupby('Category')['Amount'].sum().reset_index().sort_values('Amount', ascending=False)
-        fig_cat = px.bar(cat_sales, x='Category', y='Amount', title='Sales by Category', template=template)
-        fig_cat.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'))
-        fig_cat.update_traces(marker_color='#3a7bd5')
-    else:
-        fig_cat = px.bar(title='No Data', template=template)
-        
-    # 3. Status Pie
-    if not filtered_df.empty:
-        status_counts = filtered_df['Status'].value_counts().reset_index()
-        status_counts.columns = ['Status', 'Count']
-        fig_pie = px.pie(status_counts, values='Count', names='Status', title='Order Status Distribution', template=template)
-        fig_pie.update_layout(paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white'))
-        fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-    else:
-        fig_pie = px.pie(title='No Data', template=template)
-        
-    # 4. Region Map (Top 10 States Horizontal Bar)
-    if not filtered_df.empty:
-        state_sales = filtered_df.groupby('ship-state')['Amount'].sum().reset_index().sort_values('Amount', ascending=False).head(10)
-        fig_map = px.bar(state_sales, x='Amount', y='ship-state', orientation='h', title='Top 10 States by Revenue', template=template)
-        fig_map.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'), yaxis=dict(autorange="reversed"))
-        fig_map.update_traces(marker_color='#00d2ff')
-    else:
-        fig_map = px.bar(title='No Data', template=template)
-
-    return (
-        f"${total_sales:,.0f}",
-        f"{total_orders:,}",
-        f"${avg_order:,.0f}",
-        str(top_cat),
-        fig_trend,
-        fig_cat,
-        fig_pie,
-        fig_map
-    )
+
+    applied = {'months': selected_months, 'categories': selected_categories, 'regions': selected_regions}
+    data = datasets.current
+    # The version is part of the key so a call that started before a reload
+    # can't cache its results as the new version's
+    key = ('kpis', data.version, *normalize_selection(selected_months, selected_categories, selected_regions))
+    with metrics.stage('cache_lookup'):
+        kpi_values = result_cache.get(key)
+    if kpi_values is None:
+        selection = data.selections.get(selected_months, selected_categories, selected_regions)
+        total_sales, total_orders, avg_order, top_cat = selection.result('kpis')
+        kpi_values = (
+            f"${total_sales:,.0f}",
+            f"{total_orders:,}",
+            f"${avg_order:,.0f}",
+            str(top_cat),
+        )
+        result_cache.put(key, kpi_values, sum(len(k) for k in kpi_values))
+    return (*kpi_values, applied)
+
+
+def figure_output(name, selected, build):
+    """Figure `name` for the selected filters, rendered by build(selection) on a cache miss."""
+    data = datasets.current
+    key = (name, data.version, *normalize_selection(*selected))
+    with metrics.stage('cache_lookup'):
+        cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    fig = build(data.selections.get(*selected))
+    # Sized from its data arrays; Dash serializes the dict once, when it responds
+    size = figures.nbytes(fig)
+    metrics.nbytes('figures', size)
+    result_cache.put(key, fig, size)
+    return fig
+
+
+@app.callback(Output('sales-trend', 'figure'), [Input('submit-button', 'n_clicks')], FILTER_STATES)
+@metrics.instrument('update_sales_trend')
+def update_sales_trend(n_clicks, *selected):
+    return figure_output('sales-trend', selected, lambda selection: trend_figure(selection.result('daily')))
+
+
+@app.callback(Output('category-bar', 'figure'), [Input('submit-button', 'n_clicks')], FILTER_STATES)
+@metrics.instrument('update_category_bar')
+def update_category_bar(n_clicks, *selected):
+    return figure_output('category-bar', selected, category_figure)
+
+
+@app.callback(Output('status-pie', 'figure'), [Input('submit-button', 'n_clicks')], FILTER_STATES)
+@metrics.instrument('update_status_pie')
+def update_status_pie(n_clicks, *selected):
+    return figure_output('status-pie', selected, status_figure)
+
+
+@app.callback(Output('region-map', 'figure'), [Input('submit-button', 'n_clicks')], FILTER_STATES)
+@metrics.instrument('update_region_map')
+def update_region_map(n_clicks, *selected):
+    return figure_output('region-map', selected, region_figure)
+
+
+# Figures are filled into skeletons prebuilt by figures.py: no express or
+# validation per request
+
+def category_figure(selection):
+    if not selection.has_data:
+        return figures.NO_DATA_BAR
+    cat_sales = selection.result('category')
+    with metrics.stage('figures'):
+        return figures.fill(figures.CATEGORY_BAR, x=figures.column(cat_sales['Category']),
+                            y=figures.column(cat_sales['Amount']))
+
+
+def status_figure(selection):
+    if not selection.has_data:
+        return figures.NO_DATA_PIE
+    status_dist = selection.result('status')
+    with metrics.stage('figures'):
+        return figures.fill(figures.STATUS_PIE, labels=figures.column(status_dist['Status']),
+                            values=figures.column(status_dist['Count']))
+
+
+def region_figure(selection):
+    # Region Map (Top 10 States Horizontal Bar)
+    if not selection.has_data:
+        return figures.NO_DATA_BAR
+    top_states = selection.result('states')
+    with metrics.stage('figures'):
+        return figures.fill(figures.REGION_BAR, x=figures.column(top_states['Amount']),
+                            y=figures.column(top_states['ship-state']))
+
+
+def trend_figure(daily, x_range=None):
+    # Granularity follows the visible span and points are capped, so long
+    # histories don't ship every day to the browser
+    with metrics.stage('aggregate'):
+        trend, period = trend_points(daily, x_range)
+    metrics.rows('trend_points', len(trend))
+    if trend.empty:
+        return figures.NO_DATA_LINE
+
+    with metrics.stage('figures'):
+        layout = figures.with_title(figures.SALES_TREND['layout'], f'{GRANULARITY_LABELS[period]} Sales Trend',
+                                    x_range)
+        return figures.fill(figures.SALES_TREND, layout, x=figures.column(trend['Date']),
+                            y=figures.column(trend['Amount']))
+
+
+def zoomed_x_range(relayout_data):
+    """(start, end) of a zoom, None for a reset, False if the x axis didn't change."""
+    if not relayout_data:
+        return False
+    if relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    return False
+
+
+@app.callback(
+    Output('sales-trend', 'figure', allow_duplicate=True),
+    Input('sales-trend', 'relayoutData'),
+    State('applied-filters', 'data'),
+    prevent_initial_call=True
+)
+@metrics.instrument('zoom_sales_trend')
+def zoom_sales_trend(relayout_data, applied):
+    # Re-query the zoomed window at the finer resolution it allows
+    x_range = zoomed_x_range(relayout_data)
+    if x_range is False:
+        raise PreventUpdate
+    applied = applied or {}
+    selection = datasets.current.selections.get(applied.get('months'), applied.get('categories'),
+                                                applied.get('regions'))
+    return trend_figure(selection.result('daily'), x_range)
+
 
 if __name__ == '__main__':
     app.run(debug=True, port=8050)
@@ -0,0 +1,78 @@
+"""Compare memory and group-by time of the sale report as a DataFrame and as an EncodedTable.
+
+The DataFrame is loaded from the CSV, as text columns of Python strings,
+and from the typed artifact when there is a fresh one. Group-bys are the
+dashboard's cube build and the deep-dive report's figures. Usage:
+
+    python benchmarks/bench_encoded_table.py [path/to/cleaned_Amazon-Sale-Report.csv] [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV = os.path.join(ROOT, 'cleaned_data', 'cleaned_Amazon-Sale-Report.csv')
+CUBE_DIMENSIONS = ['Month', 'Category', 'ship-state', 'Date', 'Status']
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def pandas_cube(df):
+    # The cube as a pandas group-by, as it was built before the encoded table
+    return (df['Amount'].astype('float64', copy=False)
+            .groupby([df[dim] for dim in CUBE_DIMENSIONS], dropna=False, sort=False, observed=True)
+            .agg(Amount='sum', Orders='size').reset_index())
+
+
+def pandas_report(df):
+    # The deep-dive figures as pandas group-bys
+    month = df['Date'].dt.to_period('M')
+    amount = df['Amount'].astype('float64')
+    price = amount / df['Qty']
+    return (amount.groupby(month).sum(), df['Status'].value_counts(normalize=True),
+            amount.groupby(df['fulfilled-by'], observed=True).sum(), price.groupby(month).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    from cube import build_cube
+    from data_loader import add_month_column, artifact_is_fresh, load_sales_data
+    from deep_dive_analysis import finalize_aggregates, table_aggregates
+    from encoded_table import EncodedTable
+
+    frames = {'csv frame': load_sales_data(args.csv, use_artifact=False)}
+    if artifact_is_fresh(args.csv):
+        frames['artifact frame'] = load_sales_data(args.csv)
+    for df in frames.values():
+        add_month_column(df)
+    table = EncodedTable.from_frame(frames['csv frame'])
+
+    def encoded_report():
+        return finalize_aggregates(table_aggregates(table, 'fulfilled-by'), 'fulfilled-by')
+
+    print(f"{len(table):,} rows, median over {args.repeat} runs")
+    print(f"{'':>15} {'MB':>8} {'cube ms':>9} {'report ms':>10}")
+    for label, df in frames.items():
+        mb = df.memory_usage(index=False, deep=True).sum() / 1e6
+        print(f"{label:>15} {mb:8.1f} {timed(lambda: pandas_cube(df), args.repeat):9.1f} "
+              f"{timed(lambda: pandas_report(df), args.repeat):10.1f}")
+    print(f"{'encoded table':>15} {table.nbytes / 1e6:8.1f} {timed(lambda: build_cube(table), args.repeat):9.1f} "
+          f"{timed(encoded_report, args.repeat):10.1f}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
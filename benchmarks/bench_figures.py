@@ -0,0 +1,131 @@
+"""Time building and serializing the dashboard figures: plotly.express vs skeletons.
+
+Both paths render the same aggregates of the cleaned sale report (whole
+report selected): the old one builds each chart with plotly.express and
+serializes it with Plotly's encoder, the new one fills the precomputed
+skeletons in figures.py and serializes with figures.dumps (orjson when
+installed). Dash's own to_json_plotly is timed on the new figures too,
+since that is what the server calls per response. Usage:
+
+    python benchmarks/bench_figures.py [path/to/cleaned_Amazon-Sale-Report.csv] [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV = os.path.join(ROOT, 'cleaned_data', 'cleaned_Amazon-Sale-Report.csv')
+TEMPLATE = "plotly_dark"
+
+
+# --- plotly.express builders, as the callbacks used to be ---
+
+def px_category(px, cat_sales):
+    fig_cat = px.bar(cat_sales, x='Category', y='Amount', title='Sales by Category', template=TEMPLATE)
+    fig_cat.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'))
+    fig_cat.update_traces(marker_color='#3a7bd5')
+    return fig_cat
+
+
+def px_status(px, status_dist):
+    fig_pie = px.pie(status_dist, values='Count', names='Status', title='Order Status Distribution', template=TEMPLATE)
+    fig_pie.update_layout(paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white'))
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    return fig_pie
+
+
+def px_region(px, top_states):
+    fig_map = px.bar(top_states, x='Amount', y='ship-state', orientation='h', title='Top 10 States by Revenue',
+                     template=TEMPLATE)
+    fig_map.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'),
+                          yaxis=dict(autorange="reversed"))
+    fig_map.update_traces(marker_color='#00d2ff')
+    return fig_map
+
+
+def px_trend(px, trend, title):
+    fig_trend = px.line(trend, x='Date', y='Amount', title=title, template=TEMPLATE)
+    fig_trend.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'))
+    fig_trend.update_traces(line=dict(color='#00d2ff', width=3))
+    return fig_trend
+
+
+# --- Skeleton builders, as the callbacks are now ---
+
+def skeleton_figures(figures, cat_sales, status_dist, top_states, trend, title):
+    return [
+        figures.fill(figures.CATEGORY_BAR, x=figures.column(cat_sales['Category']),
+                     y=figures.column(cat_sales['Amount'])),
+        figures.fill(figures.STATUS_PIE, labels=figures.column(status_dist['Status']),
+                     values=figures.column(status_dist['Count'])),
+        figures.fill(figures.REGION_BAR, x=figures.column(top_states['Amount']),
+                     y=figures.column(top_states['ship-state'])),
+        figures.fill(figures.SALES_TREND, layout=figures.with_title(figures.SALES_TREND['layout'], title),
+                     x=figures.column(trend['Date']), y=figures.column(trend['Amount'])),
+    ]
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    import plotly.express as px
+    from plotly.io.json import to_json_plotly
+
+    import figures
+    from cube import build_cube, category_sales, daily_sales, state_sales, status_counts
+    from data_loader import add_month_column, load_sales_data
+    from downsample import GRANULARITY_LABELS, trend_points
+    from encoded_table import EncodedTable
+
+    df = load_sales_data(args.csv)
+    add_month_column(df)
+    cube = build_cube(EncodedTable.from_frame(df))
+    cat_sales, status_dist = category_sales(cube), status_counts(cube)
+    top_states = state_sales(cube, top_n=10)
+    trend, period = trend_points(daily_sales(cube))
+    title = f'{GRANULARITY_LABELS[period]} Sales Trend'
+
+    def build_px():
+        return [px_category(px, cat_sales), px_status(px, status_dist), px_region(px, top_states),
+                px_trend(px, trend, title)]
+
+    def build_skeletons():
+        return skeleton_figures(figures, cat_sales, status_dist, top_states, trend, title)
+
+    old_figs, new_figs = build_px(), build_skeletons()
+    results = {
+        'px build': timed(build_px, args.repeat),
+        'px to_json': timed(lambda: [fig.to_json() for fig in old_figs], args.repeat),
+        'skeleton build': timed(build_skeletons, args.repeat),
+        'figures.dumps': timed(lambda: [figures.dumps(fig) for fig in new_figs], args.repeat),
+        'dash to_json_plotly': timed(lambda: [to_json_plotly(fig) for fig in new_figs], args.repeat),
+    }
+
+    print(f"4 figures, median over {args.repeat} runs ({len(trend)} trend points, "
+          f"orjson {'on' if figures.orjson is not None else 'off'}):")
+    for label, ms in results.items():
+        print(f"{label:>20}: {ms:8.2f} ms")
+    before = results['px build'] + results['px to_json']
+    after = results['skeleton build'] + results['figures.dumps']
+    print(f"Build + serialize: {before:.2f} ms -> {after:.2f} ms ({before / after:.0f}x)")
+    print(f"Payload: {sum(len(fig.to_json()) for fig in old_figs):,} -> "
+          f"{sum(len(figures.dumps(fig)) for fig in new_figs):,} bytes")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
@@ -0,0 +1,86 @@
+"""Per-worker memory of N dashboard workers: private copies vs the shared dataset.
+
+Starts N worker processes that import app.py and serve a few callbacks, then
+reports each worker's RSS, USS (pages only it holds) and PSS (its fair share
+of shared pages). Usage:
+
+    python benchmarks/bench_shared_memory.py --workers 4 [--csv path/to/cleaned.csv]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import shutil
+import tempfile
+
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV = os.path.join(ROOT, 'cleaned_data', 'cleaned_Amazon-Sale-Report.csv')
+
+# Imports the app like a gunicorn worker would, serves some callbacks, then
+# idles until the parent has measured it
+WORKER = '''
+import sys
+sys.path.insert(0, {root!r})
+import app
+callbacks = [app.update_kpis, app.update_sales_trend, app.update_category_bar, app.update_status_pie,
+             app.update_region_map]
+for callback in callbacks:
+    callback(1, None, None, None)
+months = app.datasets.current.sales.values('Month')[:1]
+for callback in callbacks:
+    callback(2, months, None, None)
+print('ready', flush=True)
+sys.stdin.read()
+'''
+
+
+def run_workers(n, env):
+    procs = [subprocess.Popen([sys.executable, '-c', WORKER.format(root=ROOT)], env=env,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+             for _ in range(n)]
+    try:
+        for p in procs:
+            if p.stdout.readline().strip() != 'ready':
+                raise RuntimeError("worker failed to start")
+        return [psutil.Process(p.pid).memory_full_info() for p in procs]
+    finally:
+        for p in procs:
+            p.stdin.close()
+            p.wait()
+
+
+def report(label, infos):
+    mb = 1024 * 1024
+    print(f"{label}:")
+    for i, m in enumerate(infos):
+        print(f"  worker {i}: RSS {m.rss / mb:7.1f} MB  USS {m.uss / mb:7.1f} MB  PSS {m.pss / mb:7.1f} MB")
+    print(f"  total USS {sum(m.uss for m in infos) / mb:.1f} MB, total PSS {sum(m.pss for m in infos) / mb:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--csv', default=DEFAULT_CSV)
+    parser.add_argument('--shared-dir', help="Where to publish (default: a fresh dir in /dev/shm or tmp)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, SALES_DATA_PATH=args.csv)
+    env.pop('SHARED_DATA_DIR', None)
+    report(f"Private copies ({args.workers} workers)", run_workers(args.workers, env))
+
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    shared_dir = args.shared_dir or tempfile.mkdtemp(prefix='eah-shared-', dir=base)
+    subprocess.run([sys.executable, os.path.join(ROOT, 'shared_data.py'), 'publish',
+                    '--dir', shared_dir, '--csv', args.csv], check=True)
+    env['SHARED_DATA_DIR'] = shared_dir
+    try:
+        report(f"Shared dataset ({args.workers} workers)", run_workers(args.workers, env))
+    finally:
+        if not args.shared_dir:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Compare cold-start load time of the cleaned sale report: CSV vs columnar artifact.
+
+Each measurement runs in a fresh interpreter so it reflects what a restarted
+dashboard worker pays. Usage:
+
+    python benchmarks/bench_startup.py [path/to/cleaned_Amazon-Sale-Report.csv] [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV = os.path.join(ROOT, 'cleaned_data', 'cleaned_Amazon-Sale-Report.csv')
+
+# Runs inside the child interpreter; prints the load time in seconds
+CHILD = '''
+import sys, time
+sys.path.insert(0, {root!r})
+from data_loader import load_sales_data
+start = time.perf_counter()
+df = load_sales_data({csv!r}, use_artifact={use_artifact})
+print(time.perf_counter() - start, len(df))
+'''
+
+
+def time_load(csv_path, use_artifact, repeat):
+    code = CHILD.format(root=ROOT, csv=csv_path, use_artifact=use_artifact)
+    timings = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        seconds, rows = out.stdout.split()
+        timings.append(float(seconds))
+    return timings, int(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from data_loader import artifact_is_fresh, artifact_path, load_sales_data, write_artifact
+
+    if not artifact_is_fresh(args.csv):
+        print("Artifact missing or stale, building it first...")
+        write_artifact(load_sales_data(args.csv, use_artifact=False), args.csv)
+
+    csv_mb = os.path.getsize(args.csv) / 1e6
+    artifact_mb = os.path.getsize(artifact_path(args.csv)) / 1e6
+    results = {}
+    for label, use_artifact in (('csv', False), ('artifact', True)):
+        timings, rows = time_load(args.csv, use_artifact, args.repeat)
+        results[label] = statistics.median(timings)
+        print(f"{label:>9}: median {results[label]:.3f}s over {args.repeat} runs ({rows:,} rows)")
+
+    print(f"Size on disk: CSV {csv_mb:.1f} MB, artifact {artifact_mb:.1f} MB")
+    print(f"Speed-up: {results['csv'] / results['artifact']:.1f}x")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
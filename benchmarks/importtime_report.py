@@ -0,0 +1,123 @@
+"""Report what a cold start of the dashboard spends its time on, from `python -X importtime`.
+
+Each run imports app in a fresh interpreter. Threads that app starts are
+held back until its import returns, so the import-time tree is app's own.
+It is summed per top-level package (dash, plotly, pandas, ...) and the
+slowest modules are listed by their own (self) and cumulative time. The same
+child then times the steps after the import: waiting for the data to
+load, building the layout and answering the first KPI and chart
+callbacks. Usage:
+
+    python benchmarks/importtime_report.py [path/to/cleaned_Amazon-Sale-Report.csv] [--repeat N] [--top N] [--json FILE]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV = os.path.join(ROOT, 'cleaned_data', 'cleaned_Amazon-Sale-Report.csv')
+STEPS = ['import app', 'data ready', 'layout', 'first KPIs', 'first chart']
+
+# Runs inside the child interpreter; prints the step timings as JSON on stdout
+CHILD = '''
+import json, sys, time
+sys.path.insert(0, {root!r})
+import threading
+start = time.perf_counter()
+marks = {{}}
+# Hold back the threads app starts (data load, figure warm-up) until its
+# import is done, so their imports don't land in the import-time tree
+held, start_thread = [], threading.Thread.start
+threading.Thread.start = lambda thread: held.append(thread)
+import app
+threading.Thread.start = start_thread
+marks['import app'] = time.perf_counter() - start
+for thread in held:
+    thread.start()
+app.datasets.current
+marks['data ready'] = time.perf_counter() - start
+app.serve_layout()
+marks['layout'] = time.perf_counter() - start
+app.update_kpis(None, None, None, None)
+marks['first KPIs'] = time.perf_counter() - start
+app.update_sales_trend(None, None, None, None)
+marks['first chart'] = time.perf_counter() - start
+print(json.dumps(marks))
+'''
+
+
+def parse_importtime(stderr, until='app'):
+    """[(name, self_us, cumulative_us, depth)] from `-X importtime` output, in import order.
+
+    Stops after the top-level import of `until`: what the threads started
+    afterwards import is not part of it.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        if depth == 0 and name.strip() == until:
+            break
+    return modules
+
+
+def run_child(csv_path):
+    env = dict(os.environ, SALES_DATA_PATH=csv_path, DATA_RELOAD_SECONDS='0')
+    env.pop('SHARED_DATA_DIR', None)
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD.format(root=ROOT)],
+                         capture_output=True, text=True, check=True, cwd=ROOT, env=env)
+    return json.loads(out.stdout.strip().splitlines()[-1]), parse_importtime(out.stderr)
+
+
+def by_package(modules):
+    """Self time (ms) summed per top-level package."""
+    totals = {}
+    for name, self_us, _, _ in modules:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us / 1000
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args()
+
+    runs = [run_child(args.csv) for _ in range(args.repeat)]
+    steps = {step: statistics.median(marks[step] for marks, _ in runs) for step in STEPS}
+    # Module timings from the run whose import was the median one
+    modules = sorted(runs, key=lambda run: run[0]['import app'])[len(runs) // 2][1]
+    packages = by_package(modules)
+
+    print(f"Cold start, median over {args.repeat} fresh interpreters (seconds since start):")
+    for step, seconds in steps.items():
+        print(f"{step:>12}: {seconds:7.3f}")
+
+    print(f"\nImport time by package (self ms, top {args.top}):")
+    for package, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:>30}: {ms:8.1f}")
+
+    print(f"\nSlowest modules (ms, top {args.top}):")
+    print(f"{'self':>8} {'cumulative':>11}  module")
+    for name, self_us, cumulative_us, depth in sorted(modules, key=lambda m: -m[1])[:args.top]:
+        print(f"{self_us / 1000:8.1f} {cumulative_us / 1000:11.1f}  {name}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'steps': steps, 'packages': packages,
+                       'modules': [{'name': name, 'self_ms': self_us / 1000, 'cumulative_ms': cumulative_us / 1000,
+                                    'depth': depth} for name, self_us, cumulative_us, depth in modules]},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
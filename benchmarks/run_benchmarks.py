@@ -0,0 +1,363 @@
+"""Timed scenarios for cleaning, cold load and dashboard callbacks on synthetic data.
+
+Runs offline: a seeded synthetic sale report (see synthetic.py) is generated
+into the work directory and reused on later runs of the same size. Every
+scenario runs in a fresh interpreter so peak memory is its own. Results
+are written as JSON; pass an earlier file to --compare to see the change.
+Usage:
+
+    python benchmarks/run_benchmarks.py --size 1m
+    python benchmarks/run_benchmarks.py --size 1m --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, 'benchmarks')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+RAW_NAME = 'Amazon-Sale-Report.csv'
+
+SCENARIOS = ['clean', 'ingest', 'cold_load_csv', 'cold_load_artifact', 'callbacks', 'callbacks_cached']
+CALLBACK_REQUESTS = 100
+
+# Metrics shown by --compare, with whether a lower value is better
+COMPARED_METRICS = [
+    ('seconds', True),
+    ('rows_per_s', False),
+    ('p50_ms', True),
+    ('p95_ms', True),
+    ('p99_ms', True),
+    ('kpi_p50_ms', True),
+    ('peak_rss_mb', True),
+]
+
+
+def peak_rss_mb():
+    # VmHWM is this process's own high-water mark; ru_maxrss on Linux also
+    # carries over the parent's peak across fork/exec
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1e6
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        'p50_ms': pick(0.50),
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+        'mean_ms': statistics.fmean(ordered),
+    }
+
+
+# --- Workload ---
+
+def callback_mix(months, categories, states, n, seed=0):
+    """Seeded (months, categories, regions) selections resembling real use.
+
+    Mostly the unfiltered view and single-month or single-category drills,
+    then a few top states, then arbitrary combinations. Selections repeat,
+    as they do across users, so a result cache has something to hit.
+    """
+    rng = random.Random(seed)
+    top_states = states[:5]
+    mix = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.30:
+            mix.append((None, None, None))
+        elif roll < 0.55:
+            mix.append(([rng.choice(months)], None, None))
+        elif roll < 0.75:
+            mix.append((None, [rng.choice(categories)], None))
+        elif roll < 0.90:
+            mix.append((None, None, rng.sample(top_states, rng.randint(1, len(top_states)))))
+        else:
+            mix.append((rng.sample(months, rng.randint(1, min(2, len(months)))),
+                        rng.sample(categories, rng.randint(1, min(3, len(categories)))),
+                        rng.sample(states, rng.randint(1, min(5, len(states))))))
+    return mix
+
+
+# --- Scenarios (each runs in its own child interpreter) ---
+
+def scenario_clean(paths, args):
+    import pandas as pd
+    from clean_data import clean_sales_data
+
+    df = pd.read_csv(paths['raw'], low_memory=False)
+    rows = len(df)
+    start = time.perf_counter()
+    clean_sales_data(df, RAW_NAME)
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'rows': rows, 'rows_per_s': rows / seconds}
+
+
+def scenario_ingest(paths, args):
+    from clean_data import process_file
+
+    out_dir = os.path.join(paths['workdir'], 'ingest')
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+    start = time.perf_counter()
+    report, entry = process_file(paths['raw'], out_dir)
+    seconds = time.perf_counter() - start
+    if entry is None:
+        raise RuntimeError(report)
+    return {'seconds': seconds, 'rows': entry['rows'], 'rows_per_s': entry['rows'] / seconds}
+
+
+def _cold_load(data_path):
+    os.environ['SALES_DATA_PATH'] = data_path
+    os.environ.pop('SHARED_DATA_DIR', None)
+    start = time.perf_counter()
+    import app
+    # The data loads on a background thread; `current` waits for it
+    rows = len(app.datasets.current.sales)
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'rows': rows, 'rows_per_s': rows / seconds}
+
+
+def scenario_cold_load_csv(paths, args):
+    return _cold_load(paths['csv_only'])
+
+
+def scenario_cold_load_artifact(paths, args):
+    return _cold_load(paths['cleaned'])
+
+
+def _callbacks(paths, args, cache_mb, selection_mb):
+    os.environ['SALES_DATA_PATH'] = paths['cleaned']
+    os.environ['RESULT_CACHE_MB'] = str(cache_mb)
+    os.environ['SELECTION_CACHE_MB'] = str(selection_mb)
+    os.environ.pop('SHARED_DATA_DIR', None)
+    from concurrent.futures import ThreadPoolExecutor
+    import app
+    from plotly.io.json import to_json_plotly
+
+    data = app.datasets.current
+    index = data.cube_index
+    months = sorted(index.values('Month'))
+    categories = sorted(index.values('Category'))
+    states = list(data.cube.groupby('ship-state', observed=True)['Amount'].sum().sort_values(ascending=False).index)
+    mix = callback_mix(months, categories, states, args.requests, args.seed)
+
+    # A click fires the KPI and figure callbacks together, as the browser
+    # does; each response is serialized the way Dash sends it
+    callbacks = [app.update_kpis, app.update_sales_trend, app.update_category_bar, app.update_status_pie,
+                 app.update_region_map]
+
+    def respond(callback, click, selected, t0):
+        to_json_plotly(callback(click, *selected))
+        return time.perf_counter() - t0
+
+    latencies, first_latencies = [], []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(callbacks)) as browser:
+        for n_clicks, selected in enumerate(mix):
+            t0 = time.perf_counter()
+            done = list(browser.map(respond, callbacks, [n_clicks] * len(callbacks),
+                                    [selected] * len(callbacks), [t0] * len(callbacks)))
+            latencies.append(max(done) * 1000)
+            first_latencies.append(done[0] * 1000)
+    seconds = time.perf_counter() - start
+
+    result = {'seconds': seconds, 'requests': len(mix), 'requests_per_s': len(mix) / seconds}
+    result.update(percentiles(latencies))
+    result.update({f'kpi_{k}': v for k, v in percentiles(first_latencies).items()})
+    result['cache'] = app.result_cache.stats()
+    result['selection_cache'] = data.selections.cache.stats()
+    return result
+
+
+def scenario_callbacks(paths, args):
+    # Both caches off: every click slices the cube and aggregates again
+    return _callbacks(paths, args, cache_mb=0, selection_mb=0)
+
+
+def scenario_callbacks_cached(paths, args):
+    return _callbacks(paths, args, cache_mb=64, selection_mb=32)
+
+
+def run_child(name, paths, args):
+    result = globals()[f'scenario_{name}'](paths, args)
+    result['peak_rss_mb'] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+# --- Driver ---
+
+def prepare(workdir, rows, seed):
+    """Generate the raw report and its cleaned outputs once per size and seed."""
+    from synthetic import write_csv
+    from clean_data import process_file
+
+    paths = {'workdir': workdir, 'raw': os.path.join(workdir, 'raw', RAW_NAME)}
+    paths['cleaned'] = os.path.join(workdir, 'cleaned', f"cleaned_{RAW_NAME}")
+    # Same cleaned CSV with no artifact beside it, to time the CSV parse path
+    paths['csv_only'] = os.path.join(workdir, 'csv_only', f"cleaned_{RAW_NAME}")
+
+    if not os.path.exists(paths['raw']):
+        os.makedirs(os.path.dirname(paths['raw']), exist_ok=True)
+        print(f"Generating {rows:,} synthetic rows...")
+        write_csv(paths['raw'] + '.tmp', rows, seed)
+        os.replace(paths['raw'] + '.tmp', paths['raw'])
+
+    if not os.path.exists(paths['cleaned']):
+        os.makedirs(os.path.dirname(paths['cleaned']), exist_ok=True)
+        print("Cleaning it...")
+        report, entry = process_file(paths['raw'], os.path.dirname(paths['cleaned']))
+        if entry is None:
+            raise RuntimeError(report)
+
+    if not os.path.exists(paths['csv_only']):
+        os.makedirs(os.path.dirname(paths['csv_only']), exist_ok=True)
+        try:
+            os.link(paths['cleaned'], paths['csv_only'])
+        except OSError:
+            shutil.copy2(paths['cleaned'], paths['csv_only'])
+    return paths
+
+
+def run_scenario(name, paths, args):
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', name, '--workdir', paths['workdir'],
+           '--requests', str(args.requests), '--seed', str(args.seed)]
+    runs = []
+    for _ in range(args.repeat):
+        out = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+        if out.returncode != 0:
+            raise RuntimeError(f"{name} failed:\n{out.stderr}")
+        # The app may print while loading; the result is the last line
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    # Report the median run by wall time, with the worst peak memory seen
+    runs.sort(key=lambda r: r['seconds'])
+    result = dict(runs[len(runs) // 2])
+    result['peak_rss_mb'] = max(r['peak_rss_mb'] for r in runs)
+    result['runs'] = [r['seconds'] for r in runs]
+    return result
+
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=ROOT)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def format_result(name, result):
+    parts = [f"{result['seconds']:.3f}s"]
+    if 'rows_per_s' in result:
+        parts.append(f"{result['rows_per_s']:,.0f} rows/s")
+    if 'requests_per_s' in result:
+        parts.append(f"{result['requests_per_s']:,.1f} req/s")
+        parts.append(f"p50 {result['p50_ms']:.1f}ms p95 {result['p95_ms']:.1f}ms p99 {result['p99_ms']:.1f}ms")
+        if 'kpi_p50_ms' in result:
+            parts.append(f"KPIs p50 {result['kpi_p50_ms']:.1f}ms")
+    parts.append(f"peak {result['peak_rss_mb']:.0f} MB")
+    return f"{name:>20}: " + ", ".join(parts)
+
+
+def compare(old, new):
+    print(f"\nCompared with {old['meta'].get('revision')} ({old['meta'].get('timestamp')}):")
+    if old['meta'].get('rows') != new['meta'].get('rows'):
+        print(f"  warning: row counts differ ({old['meta'].get('rows'):,} vs {new['meta'].get('rows'):,})")
+    if old['meta'].get('requests') != new['meta'].get('requests'):
+        print("  warning: callback request counts differ, compare latencies rather than seconds")
+    for name, result in new['scenarios'].items():
+        before = old['scenarios'].get(name)
+        if before is None:
+            continue
+        changes = []
+        for metric, lower_is_better in COMPARED_METRICS:
+            if metric in result and before.get(metric):
+                change = (result[metric] - before[metric]) / before[metric] * 100
+                better = (change < 0) == lower_is_better
+                changes.append(f"{metric} {change:+.1f}%{'' if better or abs(change) < 10 else ' (!)'}")
+        print(f"{name:>20}: " + ", ".join(changes))
+
+
+def main():
+    from synthetic import SIZES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', default='100k', help=f"Row count or one of {', '.join(SIZES)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="Where generated data is kept between runs "
+                                          "(default: benchmarks/data/<size>-<seed>)")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh-interpreter runs per scenario")
+    parser.add_argument('--requests', type=int, default=CALLBACK_REQUESTS,
+                        help="Dashboard callbacks per callback scenario run")
+    parser.add_argument('--output', help="Results JSON (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    rows = SIZES.get(args.size.lower()) or int(args.size)
+    workdir = os.path.abspath(args.workdir or os.path.join(BENCH_DIR, 'data', f"{rows}-{args.seed}"))
+    paths = prepare(workdir, rows, args.seed)
+
+    if args.child:
+        run_child(args.child, paths, args)
+        return
+
+    timestamp = time.strftime('%Y%m%d-%H%M%S')
+    results = {
+        'meta': {
+            'timestamp': timestamp,
+            'revision': git_revision(),
+            'rows': rows,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'requests': args.requests,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'scenarios': {},
+    }
+    for name in args.scenarios:
+        results['scenarios'][name] = run_scenario(name, paths, args)
+        print(format_result(name, results['scenarios'][name]))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{timestamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    main()
@@ -0,0 +1,136 @@
+"""Seeded generator for raw Amazon-sale-report-shaped CSVs.
+
+Column names, value formats (e.g. MM-DD-YY dates) and cardinalities follow
+the real export: 9 categories, 13 statuses, ~70 ship-states with a long
+tail, thousands of SKUs/cities. Cancelled orders mostly carry no Amount and
+Qty 0, and a small share of rows are exact duplicates so cleaning has work
+to do. Usage:
+
+    python benchmarks/synthetic.py --rows 1000000 --out /tmp/Amazon-Sale-Report.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+SIZES = {'100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+CATEGORIES = ['Set', 'kurta', 'Western Dress', 'Top', 'Ethnic Dress', 'Blouse', 'Bottom', 'Saree', 'Dupatta']
+CATEGORY_WEIGHTS = [0.39, 0.385, 0.12, 0.08, 0.009, 0.007, 0.0034, 0.0013, 0.0003]
+
+STATUSES = ['Shipped', 'Shipped - Delivered to Buyer', 'Cancelled', 'Shipped - Returned to Seller',
+            'Shipped - Picked Up', 'Pending', 'Pending - Waiting for Pick Up', 'Shipped - Returning to Seller',
+            'Shipped - Out for Delivery', 'Shipped - Rejected by Buyer', 'Shipping', 'Shipped - Lost in Transit',
+            'Shipped - Damaged']
+STATUS_WEIGHTS = [0.605, 0.222, 0.142, 0.0152, 0.0076, 0.0051, 0.0023, 0.0011, 0.0003, 0.0001, 0.00007,
+                  0.00004, 0.00001]
+
+STATES = ['MAHARASHTRA', 'KARNATAKA', 'TELANGANA', 'UTTAR PRADESH', 'TAMIL NADU', 'DELHI', 'KERALA',
+          'WEST BENGAL', 'ANDHRA PRADESH', 'GUJARAT', 'HARYANA', 'RAJASTHAN', 'MADHYA PRADESH', 'ODISHA',
+          'BIHAR', 'PUNJAB', 'ASSAM', 'UTTARAKHAND', 'JHARKHAND', 'GOA', 'HIMACHAL PRADESH', 'CHHATTISGARH',
+          'JAMMU & KASHMIR', 'CHANDIGARH', 'PUDUCHERRY', 'MANIPUR', 'MEGHALAYA', 'TRIPURA', 'SIKKIM',
+          'NAGALAND', 'ARUNACHAL PRADESH', 'MIZORAM', 'LADAKH', 'DADRA AND NAGAR', 'ANDAMAN & NICOBAR',
+          'LAKSHADWEEP']
+# Misspelt/alternate state spellings found in the real export, for a long tail of ~70 values
+STATES += [s.title() for s in STATES[:20]] + ['Orissa', 'Pondicherry', 'New Delhi', 'Punjab/Mohali/Zirakpur',
+                                              'RJ', 'PB', 'AR', 'NL', 'APO', 'Rajshthan', 'rajsthan', 'Nagaland']
+
+SIZES_APPAREL = ['M', 'L', 'XL', 'XXL', 'S', '3XL', 'XS', '6XL', '5XL', '4XL', 'Free']
+SIZE_WEIGHTS = [0.175, 0.17, 0.16, 0.14, 0.132, 0.115, 0.085, 0.006, 0.005, 0.004, 0.003]
+STYLE_PREFIXES = ['SET', 'JNE', 'J0', 'MEN', 'NW', 'BL', 'BTM', 'SAR', 'DPT']
+N_STYLES = 1_400
+N_CITIES = 8_900
+DUPLICATE_SHARE = 0.001
+
+
+def _zipf_weights(n, a=1.1):
+    w = 1.0 / np.arange(1, n + 1) ** a
+    return w / w.sum()
+
+
+def _codes(rng, n, k, a=1.1):
+    return rng.choice(k, size=n, p=_zipf_weights(k, a))
+
+
+def generate(rows, seed=0, chunk_rows=500_000, start='2022-03-31', end='2022-06-29'):
+    """Yield raw-report DataFrame chunks totalling `rows` rows."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, end)
+    state_w = _zipf_weights(len(STATES), 1.3)
+    cities = np.array([f"CITY{i:04d}" for i in range(N_CITIES)], dtype=object)
+    # Each style belongs to one category, so SKUs (style + size) number in the thousands
+    style_category = rng.choice(len(CATEGORIES), size=N_STYLES, p=np.array(CATEGORY_WEIGHTS) / sum(CATEGORY_WEIGHTS))
+    style_names = pd.Series(np.array(STYLE_PREFIXES, dtype=object)[style_category]) + pd.Series(
+        np.arange(100, 100 + N_STYLES)).astype(str)
+    style_names = style_names.to_numpy(object)
+
+    offset = 0
+    while offset < rows:
+        n = min(chunk_rows, rows - offset)
+        status = rng.choice(len(STATUSES), size=n, p=np.array(STATUS_WEIGHTS) / sum(STATUS_WEIGHTS))
+        cancelled = status == STATUSES.index('Cancelled')
+        style = _codes(rng, n, N_STYLES, 0.9)
+        category = style_category[style]
+        size = rng.choice(len(SIZES_APPAREL), size=n, p=np.array(SIZE_WEIGHTS) / sum(SIZE_WEIGHTS))
+        style_str = pd.Series(style_names[style])
+        sku = style_str + '-KR-' + pd.Series(np.array(SIZES_APPAREL, dtype=object)[size])
+        amount = np.round(rng.lognormal(6.4, 0.35, n), 2)
+        amount = np.where(cancelled & (rng.random(n) < 0.8), np.nan, amount)
+        qty = np.where(cancelled, 0, rng.choice([1, 1, 1, 1, 1, 1, 1, 2, 3], size=n))
+        fulfilment = np.where(rng.random(n) < 0.695, 'Amazon', 'Merchant')
+
+        order_id = (pd.Series(rng.integers(171, 408, n)).astype(str) + '-'
+                    + pd.Series(rng.integers(0, 10**7, n)).astype(str).str.zfill(7) + '-'
+                    + pd.Series(rng.integers(0, 10**7, n)).astype(str).str.zfill(7))
+
+        chunk = pd.DataFrame({
+            'index': np.arange(offset, offset + n),
+            'Order ID': order_id,
+            'Date': pd.Series(dates[rng.integers(0, len(dates), n)]).dt.strftime('%m-%d-%y'),
+            'Status': np.array(STATUSES, dtype=object)[status],
+            'Fulfilment': fulfilment,
+            'Sales Channel': np.where(rng.random(n) < 0.999, 'Amazon.in', 'Non-Amazon'),
+            'ship-service-level': np.where(fulfilment == 'Amazon', 'Expedited', 'Standard'),
+            'Style': style_str,
+            'SKU': sku,
+            'Category': np.array(CATEGORIES, dtype=object)[category],
+            'Size': np.array(SIZES_APPAREL, dtype=object)[size],
+            'ASIN': 'B0' + pd.Series(style * len(SIZES_APPAREL) + size).astype(str).str.zfill(8),
+            'Courier Status': np.where(cancelled, 'Cancelled', 'Shipped'),
+            'Qty': qty,
+            'currency': np.where(np.isnan(amount), None, 'INR'),
+            'Amount': amount,
+            'ship-city': cities[_codes(rng, n, N_CITIES)],
+            'ship-state': np.array(STATES, dtype=object)[rng.choice(len(STATES), size=n, p=state_w)],
+            'ship-postal-code': rng.integers(110001, 855118, n),
+            'ship-country': 'IN',
+            'promotion-ids': np.where(rng.random(n) < 0.38, 'Amazon PLCC Free-Financing Universal Merchant',
+                                      None),
+            'B2B': rng.random(n) < 0.007,
+            'fulfilled-by': np.where(fulfilment == 'Merchant', 'Easy Ship', None),
+        })
+
+        # Exact duplicates of earlier rows in the chunk
+        n_dups = int(n * DUPLICATE_SHARE)
+        if n_dups:
+            kept = chunk.iloc[:n - n_dups]
+            chunk = pd.concat([kept, kept.iloc[rng.integers(0, n - n_dups, n_dups)]], ignore_index=True)
+        yield chunk
+        offset += n
+
+
+def write_csv(path, rows, seed=0, **kwargs):
+    for i, chunk in enumerate(generate(rows, seed, **kwargs)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='100k', help=f"Row count or one of {', '.join(SIZES)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+    rows = SIZES.get(args.rows.lower()) or int(args.rows)
+    write_csv(args.out, rows, args.seed)
+    print(f"Wrote {rows:,} rows to {args.out}")
@@ -1,78 +1,394 @@
+import numpy as np
 import pandas as pd
 import os
 import glob
+import io
+import codecs
+import argparse
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from pandas.util import hash_array
+
+from data_loader import write_artifact, read_artifact, artifact_path, artifact_is_fresh, ChunkedArtifactWriter
+from ingest_manifest import (load_manifest, save_manifest, plan_update, pipeline_version, load_row_hashes,
+                             save_row_hashes, contains)
+from schemas import schema_for, read_dtypes, apply_schema
 
 warnings.filterwarnings('ignore')
 
 source_dir = r"d:/all data science project/Sales dataset/sales dataset"
 output_dir = r"d:/all data science project/Sales dataset/cleaned_data"
-os.makedirs(output_dir, exist_ok=True)
 
-files = glob.glob(os.path.join(source_dir, "*.csv"))
+# Files larger than this are streamed in chunks of CHUNK_SIZE rows
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+CHUNK_SIZE = 100_000
+# Bytes read from the head of a file to pick its encoding
+ENCODING_SAMPLE_BYTES = 64 * 1024
+NUMERIC_LEADS = list('0123456789-+.')
+# Bump when a change to the cleaning steps changes what they write, so the
+# next incremental run rebuilds outputs cleaned by the old code
+CLEANER_VERSION = 2
+BOOL_TEXT = {'True': True, 'False': False, 'TRUE': True, 'FALSE': False, 'true': True, 'false': False}
 
-report = []
 
-def clean_sales_data(df, filename):
+def coerce_columns(df, schema=None):
     # Standardize column names
     df.columns = [c.strip() for c in df.columns]
-    
+
+    # Known exports: exact formats and dtypes from the schema registry
+    if schema is not None:
+        return apply_schema(df, schema)
+
     # Date parsing
     date_cols = [c for c in df.columns if 'date' in c.lower()]
     for col in date_cols:
         df[col] = pd.to_datetime(df[col], errors='coerce')
-    
+
     # Numeric conversion
     # Amount, Qty, Rate, Gross Amt
     numeric_cols = ['Amount', 'Qty', 'PCS', 'RATE', 'GROSS AMT', 'mrp', 'amount']
     for col in df.columns:
         if any(n in col.lower() for n in numeric_cols):
              df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def fill_missing_text(df, columns):
+    for col in columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            if not values.isna().any():
+                continue
+            if 'Unknown' not in values.cat.categories:
+                values = values.cat.add_categories('Unknown')
+        df[col] = values.fillna('Unknown')
+
+
+def text_columns(df):
+    return df.select_dtypes(include=['object', 'category']).columns
+
+
+def read_csv_typed(file_path, encoding, schema=None, as_text=False, **kwargs):
+    """read_csv with the schema's categoricals typed as they are parsed.
+
+    With as_text=True every other column is read as its raw text, so its
+    values don't depend on the types read_csv would infer for one chunk.
+    """
+    if schema is not None or as_text:
+        header = pd.read_csv(file_path, encoding=encoding, nrows=0).columns
+        dtypes = read_dtypes(schema, header) if schema is not None else {}
+        kwargs['dtype'] = {name: dtypes.get(name, str) for name in header} if as_text else dtypes
+        if hasattr(file_path, 'seek'):
+            file_path.seek(0)
+    return pd.read_csv(file_path, encoding=encoding, **kwargs)
+
+
+def infer_text_types(df):
+    """Give columns still holding raw text the numeric or bool type read_csv would infer, in place."""
+    for col in df.columns:
+        values = df[col]
+        if values.dtype != object:
+            continue
+        try:
+            df[col] = pd.to_numeric(values)
+            continue
+        except (ValueError, TypeError):
+            pass
+        present = values.dropna()
+        if len(present) and present.isin(BOOL_TEXT).all():
+            df[col] = values.map(BOOL_TEXT)
+    return df
+
+
+def clean_sales_data(df, filename):
+    df = coerce_columns(df, schema_for(filename))
 
     # Drop fully empty entries
     df.dropna(how='all', inplace=True)
-    
+
     # Drop duplicates
     initial_rows = len(df)
     df.drop_duplicates(inplace=True)
     deduped_rows = len(df)
-    
+
     duplicates_removed = initial_rows - deduped_rows
-    
+
     # Fill critical missing values
     # For Amount/Qty, fill 0? Or drop? Let's fill 0 for now for reporting, but be careful.
     # Actually for Sales, if Order ID is present but Amount is NaN, maybe it's cancelled?
     # Let's just handle simple NaNs for categorical
-    cat_cols = df.select_dtypes(include=['object']).columns
-    df[cat_cols] = df[cat_cols].fillna('Unknown')
-    
+    fill_missing_text(df, text_columns(df))
+
     return df, duplicates_removed
 
-for file_path in files:
+
+def detect_encoding(file_path, sample_bytes=ENCODING_SAMPLE_BYTES):
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    try:
+        # final=False: a multi-byte character cut off at the sample edge is fine
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'ISO-8859-1'
+
+
+def _column_hashes(values, parse_numbers=True):
+    # read_csv infers types per chunk, so one column can come back as 1.0 in
+    # one chunk and '1.00' in the next: with parse_numbers, numbers hash by
+    # float value wherever they turn up, everything else by its string form,
+    # missing values as 0.
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Hash each category once; same values as hashing the column as text
+        codes = values.cat.codes.to_numpy()
+        hashes = _column_hashes(pd.Series(values.cat.categories), parse_numbers)[codes]
+        hashes[codes < 0] = 0
+        return hashes
+    if pd.api.types.is_datetime64_any_dtype(values):
+        hashes = hash_array(values.to_numpy('datetime64[ns]').view('int64'))
+    elif pd.api.types.is_numeric_dtype(values):
+        hashes = hash_array(values.to_numpy('float64', na_value=np.nan))
+    else:
+        text = values.astype(str)
+        hashes = hash_array(text.to_numpy(object))
+        # Only parse values that could be numbers; to_numeric is slow on text
+        candidates = text.str[:1].isin(NUMERIC_LEADS).to_numpy() if parse_numbers else None
+        if candidates is not None and candidates.any():
+            as_num = pd.to_numeric(text[candidates], errors='coerce').to_numpy('float64')
+            parsed = ~np.isnan(as_num)
+            hashes[np.flatnonzero(candidates)[parsed]] = hash_array(as_num[parsed])
+    hashes[values.isna().to_numpy()] = 0
+    return hashes
+
+
+def _row_hashes(df, parse_numbers=True):
+    combined = np.zeros(len(df), dtype=np.uint64)
+    for col in df.columns:
+        combined = combined * np.uint64(0x100000001B3) ^ _column_hashes(df[col], parse_numbers)
+    return pd.Series(combined, index=df.index)
+
+
+def clean_chunks(chunks, output_path, append=False, existing=None, on_chunk=None, schema=None):
+    """Run chunks of one file through the cleaning steps and write them out.
+
+    Chunks come from read_csv_typed(..., as_text=True). Duplicates are
+    tracked as 64-bit hashes of the rows' raw text across all chunks, so a
+    column typed differently from one chunk to the next can't make distinct
+    rows (0123 and 123) look equal; the other columns are typed after that.
+
+    Known difference from cleaning the file in one piece: a column the
+    schema doesn't type and whose values are all numbers is compared as
+    numbers there, so rows differing only in how a number is written
+    (0123 and 123, 1e3 and 1000) count as duplicates. Here they are kept,
+    since whether a column is all numbers is only known after the last
+    chunk. Schema-typed columns compare the same on both paths.
+
+    With append=True rows go to the end of output_path instead of replacing
+    it, and rows whose hash is in the sorted `existing` array (written on an
+    earlier run) are dropped too.
+
+    Returns (rows written, duplicates removed, hashes of the written rows).
+    """
+    seen = set()
+    text_cols = set()
+    rows = duplicates_removed = 0
+    written = []
+
+    for i, chunk in enumerate(chunks):
+        chunk = coerce_columns(chunk, schema)
+        chunk.dropna(how='all', inplace=True)
+
+        hashes = _row_hashes(chunk, parse_numbers=False)
+        keep = ~hashes.duplicated() & ~hashes.map(seen.__contains__).astype(bool)
+        duplicates_removed += int((~keep).sum())
+        chunk = chunk[keep].copy()
+        seen.update(hashes[keep].tolist())
+        infer_text_types(chunk)
+
+        # A text column can be all-NaN (float) in one chunk and text in the
+        # next; keep filling it once it has been seen as text.
+        text_cols.update(text_columns(chunk))
+        fill_missing_text(chunk, [c for c in chunk.columns if c in text_cols])
+
+        # Rows from earlier runs are compared as written ('Unknown' filled in)
+        out_hashes = _row_hashes(chunk).to_numpy()
+        if existing is not None:
+            new_rows = ~contains(existing, out_hashes)
+            duplicates_removed += int((~new_rows).sum())
+            chunk, out_hashes = chunk[new_rows], out_hashes[new_rows]
+
+        first = i == 0 and not append
+        chunk.to_csv(output_path, mode='w' if first else 'a', header=first, index=False)
+        if on_chunk is not None:
+            on_chunk(chunk)
+        written.append(out_hashes)
+        rows += len(chunk)
+
+    return rows, duplicates_removed, np.concatenate(written) if written else np.empty(0, np.uint64)
+
+
+def clean_file_chunked(file_path, output_path, encoding, chunksize=CHUNK_SIZE):
+    """Stream one file through the cleaning steps with bounded memory."""
+    artifact = ChunkedArtifactWriter(output_path)
+    schema = schema_for(os.path.basename(file_path))
+    reader = read_csv_typed(file_path, encoding, schema, as_text=True, chunksize=chunksize, low_memory=False)
+    rows, dups, hashes = clean_chunks(reader, output_path, on_chunk=artifact.write, schema=schema)
+    artifact.close()
+    return rows, dups, hashes
+
+
+def clean_appended_rows(file_path, output_path, previous, chunksize=CHUNK_SIZE):
+    """Clean only the rows added to file_path since the last run.
+
+    The new rows are deduplicated against everything already in the cleaned
+    output and appended to it; rows already written are left untouched.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        f.seek(previous['size'])
+        tail = f.read()
+
+    # Check before appending: the CSV's signature changes once we write to it
+    old_artifact = None
+    if artifact_is_fresh(output_path):
+        old_artifact = read_artifact(artifact_path(output_path))
+    existing = load_row_hashes(output_path)
+    if existing is None:
+        raise ValueError("row hashes of the cleaned output are unreadable; rerun with --full")
+
+    new_chunks = []
+    schema = schema_for(os.path.basename(file_path))
+    source = io.BytesIO(header + tail)
+    reader = read_csv_typed(source, previous['encoding'], schema, as_text=True, chunksize=chunksize,
+                            low_memory=False)
+    rows, dups, hashes = clean_chunks(reader, output_path, append=True, existing=existing,
+                                      on_chunk=new_chunks.append, schema=schema)
+    save_row_hashes(output_path, np.concatenate([existing, hashes]))
+
+    if old_artifact is not None:
+        # Parquet can't be appended to, but rewriting it from the old artifact
+        # is still far cheaper than re-cleaning the source
+        write_artifact(pd.concat([old_artifact, *new_chunks], ignore_index=True), output_path)
+    return rows, dups
+
+
+def process_file(file_path, out_dir, chunksize=CHUNK_SIZE, stream_threshold=STREAM_THRESHOLD_BYTES,
+                 previous=None):
+    """Clean one source file into out_dir.
+
+    `previous` is the file's manifest entry from the last run, if any.
+    Returns the report line and the new manifest entry (None on failure).
+    """
     filename = os.path.basename(file_path)
+    output_path = os.path.join(out_dir, f"cleaned_{filename}")
+
     try:
-        # Try reading with default, if fail, try encoding
+        pipeline = pipeline_version(schema_for(filename), CLEANER_VERSION)
+        action, entry = plan_update(file_path, output_path, previous, pipeline)
+        if action == 'skip':
+            entry.update(rows=previous['rows'], encoding=previous['encoding'])
+            return f"{filename}: Unchanged. Rows: {entry['rows']}", entry
+
+        if action == 'append':
+            rows, dups = clean_appended_rows(file_path, output_path, previous, chunksize)
+            entry.update(rows=previous['rows'] + rows, encoding=previous['encoding'])
+            return (f"{filename}: Success (appended). Rows: {entry['rows']}, New Rows: {rows}, "
+                    f"Duplicates Removed: {dups}"), entry
+
+        streamed = entry['size'] > stream_threshold
+
+        def clean(encoding):
+            if streamed:
+                return clean_file_chunked(file_path, output_path, encoding, chunksize)
+            return clean_file(file_path, output_path, encoding)
+
+        encoding = detect_encoding(file_path)
         try:
-            df = pd.read_csv(file_path, encoding='utf-8')
-        except:
-            df = pd.read_csv(file_path, encoding='ISO-8859-1')
-            
-        # Basic Strategy: 
-        # If it has "Date" or "Order ID" or "SKU", treat as Sales.
-        # If "Particular" or "Expense", treat as Financial.
-        
-        cols_lower = [c.lower() for c in df.columns]
-        
-        is_sales = any(x in cols_lower for x in ['date', 'order id', 'sku', 'asin'])
-        
-        cleaned_df, dups = clean_sales_data(df, filename)
-        
-        output_path = os.path.join(output_dir, f"cleaned_{filename}")
-        cleaned_df.to_csv(output_path, index=False)
-        
-        report.append(f"{filename}: Success. Rows: {len(cleaned_df)}, Duplicates Removed: {dups}")
-        
+            rows, dups, hashes = clean(encoding)
+        except UnicodeDecodeError:
+            # Non-UTF-8 bytes past the sampled head
+            if encoding == 'ISO-8859-1':
+                raise
+            encoding = 'ISO-8859-1'
+            rows, dups, hashes = clean(encoding)
+
+        save_row_hashes(output_path, hashes)
+        entry.update(rows=rows, encoding=encoding)
+        return f"{filename}: Success. Rows: {rows}, Duplicates Removed: {dups}", entry
+
     except Exception as e:
-        report.append(f"{filename}: Failed. Error: {str(e)}")
+        return f"{filename}: Failed. Error: {str(e)}", None
+
+
+def clean_file(file_path, output_path, encoding):
+    df = read_csv_typed(file_path, encoding, schema_for(os.path.basename(file_path)))
+
+    # Basic Strategy:
+    # If it has "Date" or "Order ID" or "SKU", treat as Sales.
+    # If "Particular" or "Expense", treat as Financial.
+
+    cols_lower = [c.lower() for c in df.columns]
+
+    is_sales = any(x in cols_lower for x in ['date', 'order id', 'sku', 'asin'])
+
+    cleaned_df, dups = clean_sales_data(df, os.path.basename(file_path))
+
+    cleaned_df.to_csv(output_path, index=False)
+    # Typed columnar copy so consumers can skip CSV parsing at startup
+    write_artifact(cleaned_df, output_path)
+    return len(cleaned_df), dups, _row_hashes(cleaned_df).to_numpy()
+
+
+def run(files, out_dir, workers=1, chunksize=CHUNK_SIZE, stream_threshold=STREAM_THRESHOLD_BYTES,
+        incremental=True):
+    """Clean every file into out_dir and return the report lines, in input order.
+
+    With incremental=True, files the manifest in out_dir shows as unchanged
+    are skipped and append-only growth is cleaned as a delta.
+    """
+    manifest = load_manifest(out_dir) if incremental else {}
+    names = [os.path.basename(f) for f in files]
+    previous = [manifest.get(name) for name in names]
+
+    n = len(files)
+    args = (files, [out_dir] * n, [chunksize] * n, [stream_threshold] * n, previous)
+    if workers == 1 or n <= 1:
+        results = list(map(process_file, *args))
+    else:
+        workers = min(workers or os.cpu_count() or 1, n)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(process_file, *args))
+
+    # Failed files drop out of the manifest so the next run rebuilds them
+    manifest = load_manifest(out_dir)
+    for name, (_, entry) in zip(names, results):
+        if entry is None:
+            manifest.pop(name, None)
+        else:
+            manifest[name] = entry
+    save_manifest(out_dir, manifest)
+    return [line for line, _ in results]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Clean the raw sales exports into cleaned_data/.")
+    parser.add_argument('--source-dir', default=source_dir)
+    parser.add_argument('--output-dir', default=output_dir)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Files cleaned in parallel; 0 means one per file, capped at the CPU count.")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE,
+                        help="Rows per chunk when streaming large files.")
+    parser.add_argument('--full', action='store_true',
+                        help="Rebuild every file, ignoring the manifest of previous runs.")
+    parser.add_argument('--stream-threshold-mb', type=float, default=STREAM_THRESHOLD_BYTES / 1024 / 1024,
+                        help="Files bigger than this are streamed in chunks.")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    files = glob.glob(os.path.join(args.source_dir, "*.csv"))
+
+    report = run(files, args.output_dir, args.workers, args.chunksize,
+                 int(args.stream_threshold_mb * 1024 * 1024), incremental=not args.full)
 
-print("\n".join(report))
+    print("\n".join(report))
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from filter_index import FilterIndex
+from encoded_table import AMOUNT_DECIMALS, NAT_DAY, dates_from_days, group_rows, group_sums, offset_codes
+
+# Dimensions the dashboard filters or groups on. Every KPI and figure in
+# app.py can be answered from Amount sums and order counts at this grain.
+CUBE_DIMENSIONS = ['Month', 'Category', 'ship-state', 'Date', 'Status']
+# The dropdown filters, indexed for fast slicing
+FILTER_DIMENSIONS = ['Month', 'Category', 'ship-state']
+
+
+def build_cube(table):
+    """Amount sums and order counts per dimension combination of an EncodedTable.
+
+    One row per distinct combination, in order of first appearance so that
+    tie-breaking in the slices below matches a raw-row scan. Missing keys
+    are kept because the raw scans count those rows too. Text dimensions
+    come out as categoricals sharing the table's lookups; Date stays an
+    int32 day number.
+    """
+    group_ids, first_rows = group_rows([table.key(dim) for dim in CUBE_DIMENSIONS])
+    cube = {dim: table.decode(dim, first_rows) for dim in CUBE_DIMENSIONS if dim != 'Date'}
+    cube['Date'] = table['Date'][first_rows]
+    cube['Amount'], _ = group_sums(group_ids, len(first_rows), table['Amount'], AMOUNT_DECIMALS)
+    cube['Orders'], _ = group_sums(group_ids, len(first_rows))
+    return pd.DataFrame(cube, columns=CUBE_DIMENSIONS + ['Amount', 'Orders'])
+
+
+def build_cube_index(cube):
+    return FilterIndex(cube, FILTER_DIMENSIONS)
+
+
+def slice_cube(cube, index, months=None, categories=None, regions=None):
+    rows = index.select({'Month': months, 'Category': categories, 'ship-state': regions})
+    # Row ids come back ascending, so first-appearance order is preserved
+    return cube if rows is None else cube.take(rows)
+
+
+# --- Aggregations over a cube slice ---
+
+def _sums_by(cube_slice, dim, measure):
+    """(values, sums) of `measure` per value of a categorical dimension present in the slice, values sorted."""
+    column = cube_slice[dim].cat
+    decimals = AMOUNT_DECIMALS if measure == 'Amount' else None
+    sums, present = group_sums(column.codes.to_numpy(), len(column.categories), cube_slice[measure].to_numpy(),
+                               decimals)
+    return column.categories.to_numpy(dtype=object)[present], sums[present]
+
+
+def kpis(cube_slice):
+    total_sales = cube_slice['Amount'].sum()
+    total_orders = int(cube_slice['Orders'].sum())
+    avg_order = total_sales / total_orders if total_orders > 0 else 0
+    # Same result as Series.mode()[0]: most frequent category, smallest on ties
+    categories, orders = _sums_by(cube_slice, 'Category', 'Orders')
+    top_cat = categories[np.argmax(orders)] if len(orders) else "N/A"
+    return total_sales, total_orders, avg_order, top_cat
+
+
+def daily_sales(cube_slice):
+    codes, first_day, n_days = offset_codes(cube_slice['Date'].to_numpy(), NAT_DAY)
+    sums, present = group_sums(codes, n_days, cube_slice['Amount'].to_numpy(), AMOUNT_DECIMALS)
+    days = np.flatnonzero(present) + first_day
+    return pd.DataFrame({'Date': dates_from_days(days), 'Amount': sums[present]})
+
+
+def category_sales(cube_slice):
+    categories, sums = _sums_by(cube_slice, 'Category', 'Amount')
+    return pd.DataFrame({'Category': categories, 'Amount': sums}).sort_values('Amount', ascending=False)
+
+
+def status_counts(cube_slice):
+    # Same ordering as Series.value_counts(): counts in first-appearance order,
+    # then the same (unstable) descending sort value_counts applies
+    column = cube_slice['Status'].cat
+    codes = column.codes.to_numpy()
+    counts, _ = group_sums(codes, len(column.categories), cube_slice['Orders'].to_numpy())
+    present_codes, first_rows = np.unique(codes[codes >= 0], return_index=True)
+    order = present_codes[np.argsort(first_rows, kind='stable')]
+    counts = pd.Series(counts[order].astype('int64'), index=column.categories.to_numpy(dtype=object)[order])
+    counts = counts.sort_values(ascending=False).reset_index()
+    counts.columns = ['Status', 'Count']
+    return counts
+
+
+def state_sales(cube_slice, top_n=10):
+    states, sums = _sums_by(cube_slice, 'ship-state', 'Amount')
+    return pd.DataFrame({'ship-state': states, 'Amount': sums}).sort_values('Amount', ascending=False).head(top_n)
@@ -0,0 +1,180 @@
+import os
+import json
+
+import pandas as pd
+
+# Object columns with at most this share of distinct values are stored as
+# categoricals in the columnar artifact.
+CATEGORY_RATIO = 0.5
+
+# Schema metadata keys: which CSV the artifact was built from, the
+# clean_data.CLEANER_VERSION that wrote it, and which string columns to read
+# back as categoricals (chunked artifacts only).
+SOURCE_META_KEY = b'eah_source_csv'
+CLEANER_META_KEY = b'eah_cleaner_version'
+CATEGORIES_META_KEY = b'eah_categoricals'
+
+
+def artifact_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _cleaner_version():
+    from clean_data import CLEANER_VERSION
+    return str(CLEANER_VERSION)
+
+
+def _arrow_ready(df, categorize=True):
+    df = df.copy()
+    for col in df.select_dtypes(include=['object']).columns:
+        values = df[col]
+        # Mixed str/number columns (e.g. postal codes) can't go to Arrow as-is
+        if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+            values = values.where(values.isna(), values.astype(str))
+        if categorize and _is_low_cardinality(values):
+            values = values.astype('category')
+        df[col] = values
+    return df
+
+
+def _is_low_cardinality(values):
+    return len(values) > 0 and values.nunique() <= CATEGORY_RATIO * len(values)
+
+
+def write_artifact(df, csv_path):
+    """Write a typed Parquet copy of a cleaned CSV next to it.
+
+    Call this after the CSV itself has been written: the artifact records
+    the CSV's size and mtime and is only trusted while those still match.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(_arrow_ready(df), preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[SOURCE_META_KEY] = json.dumps(_source_signature(csv_path)).encode()
+    meta[CLEANER_META_KEY] = _cleaner_version().encode()
+    table = table.replace_schema_metadata(meta)
+
+    path = artifact_path(csv_path)
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ChunkedArtifactWriter:
+    """Build the columnar artifact one cleaned chunk at a time.
+
+    The first chunk fixes the Arrow schema and which string columns are read
+    back as categoricals. A later chunk that can't be cast to that schema
+    abandons the artifact, so consumers keep falling back to the CSV.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.path = artifact_path(csv_path)
+        self.failed = False
+        self._tmp_path = self.path + '.tmp'
+        self._writer = None
+        self._schema = None
+
+    def write(self, chunk):
+        if self.failed:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        try:
+            table = pa.Table.from_pandas(_arrow_ready(chunk, categorize=False), preserve_index=False)
+            if self._writer is None:
+                categoricals = [c for c in chunk.select_dtypes(include=['object']).columns
+                                if _is_low_cardinality(chunk[c])]
+                meta = dict(table.schema.metadata or {})
+                meta[CATEGORIES_META_KEY] = json.dumps(categoricals).encode()
+                self._schema = table.schema.with_metadata(meta)
+                self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+            self._writer.write_table(table.cast(self._schema))
+        except Exception as e:
+            print(f"Skipping columnar artifact for {os.path.basename(self.csv_path)}: {e}")
+            self.abort()
+
+    def close(self):
+        """Finish the artifact. Call after the CSV has been fully written."""
+        if self.failed or self._writer is None:
+            self.abort()
+            return None
+        self._writer.add_key_value_metadata({SOURCE_META_KEY: json.dumps(_source_signature(self.csv_path)),
+                                             CLEANER_META_KEY: _cleaner_version()})
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        self.failed = True
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+def read_artifact(path):
+    import pyarrow.parquet as pq
+
+    meta = pq.read_metadata(path).metadata or {}
+    categoricals = json.loads(meta.get(CATEGORIES_META_KEY, b'[]'))
+    return pd.read_parquet(path, read_dictionary=categoricals or None)
+
+
+def artifact_is_fresh(csv_path):
+    path = artifact_path(csv_path)
+    if not os.path.exists(path):
+        return False
+    try:
+        import pyarrow.parquet as pq
+        # File-level key/value metadata: chunked artifacts add the source
+        # signature on close, after the Arrow schema has been written
+        meta = pq.read_metadata(path).metadata or {}
+        recorded = json.loads(meta[SOURCE_META_KEY])
+    except Exception:
+        return False
+    if not os.path.exists(csv_path):
+        # Artifact shipped without its CSV: nothing to be stale against
+        return True
+    # Also stale when written by older cleaning code (e.g. one that stored
+    # money as float32), so the next clean_data run rebuilds it
+    return (recorded == _source_signature(csv_path)
+            and meta.get(CLEANER_META_KEY, b'').decode() == _cleaner_version())
+
+
+def load_cleaned(csv_path, use_artifact=True):
+    """Load any cleaned output, from its columnar artifact when that is fresh."""
+    if use_artifact and artifact_is_fresh(csv_path):
+        try:
+            return read_artifact(artifact_path(csv_path))
+        except Exception as e:
+            print(f"Ignoring unreadable artifact for {os.path.basename(csv_path)}: {e}")
+    return pd.read_csv(csv_path, low_memory=False)
+
+
+def load_sales_data(csv_path, use_artifact=True):
+    """Load a cleaned sale report with `Date` parsed.
+
+    Reads the columnar artifact when it is fresh, otherwise parses the CSV.
+    """
+    df = load_cleaned(csv_path, use_artifact)
+    if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    return df
+
+
+def add_month_column(df):
+    """Add the dashboard's 'YYYY-MM' Month label ('NaT' for missing dates)."""
+    df['Month'] = df['Date'].dt.to_period('M').astype(str)
+    return df
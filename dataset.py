@@ -0,0 +1,151 @@
+"""The dashboard's dataset, loaded off the import path and swapped for newer versions.
+
+A Dataset bundles one version of the sales rows with the cube, index and
+selection memo built from it, and is never modified once built. The
+DatasetHolder keeps the live one in a single attribute. A background
+thread loads the first version, so importing the app doesn't wait for
+the data, then polls the data version. When the version changes and then stays
+the same for one poll interval (so a file still being written is not
+read half-way), the thread loads and indexes the new version and swaps
+the attribute. Callbacks read `holder.current` once and use that Dataset
+for the whole call. They never wait on a reload and never see a
+half-built one.
+"""
+import os
+import threading
+
+from cube import build_cube, build_cube_index
+from selection import SelectionMemo
+from instrumentation import metrics
+
+
+class Dataset:
+    """One version of the sales rows and everything the callbacks derive from it."""
+
+    def __init__(self, version, sales, selection_bytes, pool=None):
+        self.version = version
+        self.sales = sales
+        # Pre-aggregated cube; callbacks only ever read slices of this, located
+        # through the inverted index on the filter dimensions
+        with metrics.stage('build_cube'):
+            self.cube = build_cube(sales)
+        with metrics.stage('build_index'):
+            self.cube_index = build_cube_index(self.cube)
+        # Cube slices (and their aggregations) shared by the callbacks of one click
+        self.selections = SelectionMemo(self.cube, self.cube_index, selection_bytes, pool=pool)
+        self.selections.set_version(version)
+
+
+class DatasetHolder:
+    """The live Dataset, loaded on a background thread and reloaded when `data_version()` changes.
+
+    `load(version)` builds a Dataset. It runs on the watcher thread. If
+    the first load fails, `fallback(version)` stands in for it. A failed
+    reload keeps the current Dataset until the version changes again.
+    `on_swap(dataset)` runs right after each swap, the first load included.
+    """
+
+    def __init__(self, load, data_version, fallback, on_swap=None):
+        self.load = load
+        self.data_version = data_version
+        self.fallback = fallback
+        self.on_swap = on_swap
+        self.reloads = 0
+        self._current = None
+        self._ready = threading.Event()
+        self._seen = None
+        self._failed = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._interval = 0
+        self._start_in_children = False
+        # Threads don't survive a fork (gunicorn --preload): start the
+        # watcher, and the first load if it hadn't finished, in each worker
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    @property
+    def current(self):
+        """The live Dataset; waits for the first load if it is still running."""
+        if self._current is None:
+            self._ready.wait()
+        return self._current
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def load_initial(self):
+        """Load the first Dataset on the calling thread (a no-op once loaded)."""
+        if self._ready.is_set():
+            return
+        version = self.data_version()
+        try:
+            dataset = self.load(version)
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            dataset = self.fallback(version)
+        self._seen = version
+        self._swap(dataset)
+        self._ready.set()
+
+    def check(self):
+        """Reload if the data changed and has settled since the last check; True if swapped."""
+        version = self.data_version()
+        if version is None or version in (self._current.version, self._failed):
+            self._seen = version
+            return False
+        if version != self._seen:
+            # Changed since the last check: it may still be being written
+            self._seen = version
+            return False
+
+        try:
+            with metrics.stage('reload'):
+                dataset = self.load(version)
+        except Exception as e:
+            print(f"Reloading data version {version} failed, keeping {self._current.version}: {e}")
+            self._failed = version
+            return False
+        self.reloads += 1
+        self._swap(dataset)
+        return True
+
+    def _swap(self, dataset):
+        self._current = dataset
+        if self.on_swap is not None:
+            self.on_swap(dataset)
+
+    def start(self, interval, in_children=False):
+        """Load in the background, then check every `interval` seconds (never for 0).
+
+        With in_children, nothing starts in this process. Each process forked
+        from it starts its own instead, e.g. the workers of a gunicorn
+        --preload master that never serves requests itself.
+        """
+        self._interval = interval
+        if in_children:
+            self._start_in_children = True
+            return
+        if self._thread is not None or (self._ready.is_set() and interval <= 0):
+            return
+        self._thread = threading.Thread(target=self._watch, name='data-reload', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        self.load_initial()
+        if self._interval <= 0:
+            return
+        while not self._stop.wait(self._interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Data version check failed: {e}")
+
+    def _after_fork(self):
+        if self._thread is not None or self._start_in_children:
+            self._thread = None
+            self._start_in_children = False
+            self.start(self._interval)
@@ -1,57 +1,191 @@
+import numpy as np
 import pandas as pd
 import os
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from data_loader import load_sales_data, artifact_is_fresh, artifact_path
+from encoded_table import AMOUNT_DECIMALS, NAT_DAY, EncodedTable, group_sums, month_numbers, offset_codes
 
 data_path = r"d:/all data science project/Sales dataset/cleaned_data/cleaned_Amazon-Sale-Report.csv"
 
-try:
-    df = pd.read_csv(data_path, low_memory=False)
-    
-    # Preprocessing
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df['Month'] = df['Date'].dt.to_period('M')
-    
-    # 1. Trend Analysis
-    monthly_sales = df.groupby('Month')['Amount'].sum()
-    print("--- Monthly Sales ---")
-    print(monthly_sales)
-    
+CHUNK_SIZE = 200_000
+FULFILLMENT_COLUMNS = ['Fulfilled-by', 'fulfilled-by']
+
+
+def fulfillment_column(columns):
+    return next((c for c in FULFILLMENT_COLUMNS if c in columns), None)
+
+
+def analyze(df):
+    """All report figures from a fully loaded sale report."""
+    fulfilled_by = fulfillment_column(df.columns)
+    return finalize_aggregates(partial_aggregates(df, fulfilled_by), fulfilled_by)
+
+
+# --- Mergeable partial aggregates, for a whole report or one chunk at a time ---
+
+def partial_aggregates(chunk, fulfilled_by=None):
+    """Sums and counts for one chunk; combine with merge_aggregates."""
+    columns = ['Date', 'Status', 'Amount', 'Qty'] + ([fulfilled_by] if fulfilled_by else [])
+    return table_aggregates(EncodedTable.from_frame(chunk[columns]), fulfilled_by)
+
+
+def table_aggregates(table, fulfilled_by=None):
+    """partial_aggregates() of an EncodedTable: bincounts over month numbers and text codes."""
+    month_codes, first_month, n_months = offset_codes(month_numbers(table['Date']), NAT_DAY)
+    amount = table['Amount']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price = amount.astype('float64') / table['Qty']
+
+    monthly_sales, present = group_sums(month_codes, n_months, amount, AMOUNT_DECIMALS)
+    price_sum, _ = group_sums(month_codes, n_months, price)
+    price_count, _ = group_sums(month_codes, n_months, ~np.isnan(price))
+    months = pd.PeriodIndex.from_ordinals(np.flatnonzero(present) + first_month, freq='M')
+    agg = {
+        'monthly_sales': pd.Series(monthly_sales[present], index=months),
+        'status': table.sums_by('Status'),
+        'price_sum': pd.Series(price_sum[present], index=months),
+        'price_count': pd.Series(price_count[present].astype('int64'), index=months),
+    }
+    if fulfilled_by:
+        agg['fulfillment_sales'] = table.sums_by(fulfilled_by, amount, AMOUNT_DECIMALS)
+    return agg
+
+
+def _merge_series(a, b):
+    # Keeps first-appearance order of keys, as a single pass would see them
+    return pd.concat([a, b]).groupby(level=0, sort=False, observed=True).sum()
+
+
+def merge_aggregates(a, b):
+    if a is None:
+        return b
+    return {key: _merge_series(a[key], b[key]) for key in a}
+
+
+def finalize_aggregates(agg, fulfilled_by=None):
+    """Turn merged partial aggregates into the same figures analyze() returns."""
+    # Merged chunk sums are rounded again, as one pass over the rows would be
+    monthly_sales = agg['monthly_sales'].sort_index().round(AMOUNT_DECIMALS).rename('Amount')
+    monthly_sales.index.name = 'Month'
+
+    status = agg['status'][agg['status'] > 0]
+    status_counts = (status / status.sum() * 100).sort_values(ascending=False)
+    status_counts.index.name = 'Status'
+    status_counts.name = 'proportion'
+
+    if fulfilled_by:
+        fulfillment_sales = agg['fulfillment_sales'].sort_index().round(AMOUNT_DECIMALS).rename('Amount')
+        fulfillment_sales.index.name = fulfilled_by
+    else:
+        fulfillment_sales = "Column not found"
+
+    counts = agg['price_count'].sort_index()
+    monthly_avg_price = (agg['price_sum'].sort_index() / counts.where(counts > 0)).rename('AvgPrice')
+    monthly_avg_price.index.name = 'Month'
+
+    return {
+        'monthly_sales': monthly_sales,
+        'status_counts': status_counts,
+        'fulfillment_sales': fulfillment_sales,
+        'monthly_avg_price': monthly_avg_price,
+    }
+
+
+def iter_chunks(path, columns, chunksize=CHUNK_SIZE):
+    """Yield DataFrame chunks of just `columns`, from the artifact if fresh."""
+    if artifact_is_fresh(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(artifact_path(path)).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize, low_memory=False)
+
+
+def source_columns(path):
+    if artifact_is_fresh(path):
+        import pyarrow.parquet as pq
+        return pq.read_schema(artifact_path(path)).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def analyze_streaming(path, chunksize=CHUNK_SIZE, workers=1):
+    """Same figures as analyze(), in one pass with memory bounded by the chunk size.
+
+    With workers > 1, chunks are aggregated on a process pool while the next
+    ones are read; at most 2 * workers chunks are in flight at once.
+    """
+    fulfilled_by = fulfillment_column(source_columns(path))
+    columns = ['Date', 'Status', 'Amount', 'Qty'] + ([fulfilled_by] if fulfilled_by else [])
+    agg = None
+
+    if workers <= 1:
+        for chunk in iter_chunks(path, columns, chunksize):
+            agg = merge_aggregates(agg, partial_aggregates(chunk, fulfilled_by))
+    else:
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in iter_chunks(path, columns, chunksize):
+                pending.append(pool.submit(partial_aggregates, chunk, fulfilled_by))
+                if len(pending) >= 2 * workers:
+                    agg = merge_aggregates(agg, pending.popleft().result())
+            while pending:
+                agg = merge_aggregates(agg, pending.popleft().result())
+
+    if agg is None:
+        agg = partial_aggregates(pd.DataFrame(columns=columns), fulfilled_by)
+    return finalize_aggregates(agg, fulfilled_by)
+
+
+def print_report(results, file=None):
+    monthly_sales = results['monthly_sales']
+    print("--- Monthly Sales ---", file=file)
+    print(monthly_sales, file=file)
+
     # Growth Calculation (Last Month vs First Month or Month-over-Month)
     if len(monthly_sales) > 1:
         first_month = monthly_sales.iloc[0]
         last_month = monthly_sales.iloc[-1]
         growth = ((last_month - first_month) / first_month) * 100
-        print(f"\nOverall Growth: {growth:.2f}%")
-        
+        print(f"\nOverall Growth: {growth:.2f}%", file=file)
+
         # Check decline in recent months
         recent_growth = monthly_sales.pct_change().tail(3)
-        print("\nRecent Month-over-Month Growth:")
-        print(recent_growth)
-        
-    # 2. Reasons (Cancellation Rate)
+        print("\nRecent Month-over-Month Growth:", file=file)
+        print(recent_growth, file=file)
+
     # Check 'Status' column
-    print("\n--- Status Distribution ---")
-    status_counts = df['Status'].value_counts(normalize=True) * 100
-    print(status_counts.head(5))
-    
+    print("\n--- Status Distribution ---", file=file)
+    status_counts = results['status_counts']
+    print(status_counts.head(5), file=file)
+
     cancellation_rate = status_counts.get('Cancelled', 0)
-    print(f"\nCancellation Rate: {cancellation_rate:.2f}%")
-    
-    # 3. Fulfillment Impact
-    print("\n--- Fulfillment Analysis ---")
-    if 'Fulfilled-by' in df.columns:
-        fulfillment_sales = df.groupby('Fulfilled-by')['Amount'].sum()
-    elif 'fulfilled-by' in df.columns:
-        fulfillment_sales = df.groupby('fulfilled-by')['Amount'].sum()
-    else:
-        fulfillment_sales = "Column not found"
-    print(fulfillment_sales)
+    print(f"\nCancellation Rate: {cancellation_rate:.2f}%", file=file)
+
+    print("\n--- Fulfillment Analysis ---", file=file)
+    print(results['fulfillment_sales'], file=file)
+
+    print("\n--- Monthly Avg Price per Unit ---", file=file)
+    print(results['monthly_avg_price'], file=file)
+
 
-    # 4. Quantity vs Amount (Discounting?)
-    # Avg Price per unit over time
-    df['AvgPrice'] = df['Amount'] / df['Qty']
-    monthly_avg_price = df.groupby('Month')['AvgPrice'].mean()
-    print("\n--- Monthly Avg Price per Unit ---")
-    print(monthly_avg_price)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Trend, cancellation and fulfillment deep dive.")
+    parser.add_argument('path', nargs='?', default=data_path)
+    parser.add_argument('--stream', action='store_true',
+                        help="Process the file in chunks instead of loading it whole.")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Aggregate chunks on this many processes (with --stream).")
+    args = parser.parse_args()
 
-except Exception as e:
-    print(f"Error: {e}")
+    try:
+        if args.stream:
+            results = analyze_streaming(args.path, args.chunksize, args.workers)
+        else:
+            results = analyze(load_sales_data(args.path))
+        print_report(results)
+    except Exception as e:
+        print(f"Error: {e}")
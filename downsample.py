@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Upper bound on points sent to the browser per trace
+MAX_TREND_POINTS = 500
+
+# (max span in days, period) - the first period whose span limit fits wins
+GRANULARITIES = [(120, 'D'), (2 * 365, 'W'), (None, 'M')]
+GRANULARITY_LABELS = {'D': 'Daily', 'W': 'Weekly', 'M': 'Monthly'}
+
+
+def choose_granularity(start, end):
+    span_days = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    for max_days, period in GRANULARITIES:
+        if max_days is None or span_days <= max_days:
+            return period
+
+
+def resample_sales(daily, period):
+    """Sum a Date/Amount frame into day, week or month buckets."""
+    if period == 'D':
+        return daily
+    buckets = daily['Date'].dt.to_period(period).dt.start_time
+    return daily.groupby(buckets)['Amount'].sum().rename_axis('Date').reset_index()
+
+
+def lttb(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point and, from each of threshold - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the next bucket's average. x must be numeric
+    and sorted.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def trend_points(daily, x_range=None, max_points=MAX_TREND_POINTS):
+    """Pick the granularity for the visible span and cap the point count.
+
+    Returns the (Date, Amount) frame to plot and the period used.
+    """
+    daily = daily.dropna(subset=['Date'])
+    if x_range is not None:
+        start, end = pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+        daily = daily[(daily['Date'] >= start.floor('D')) & (daily['Date'] <= end)]
+    if daily.empty:
+        return daily, 'D'
+
+    start, end = x_range if x_range is not None else (daily['Date'].iloc[0], daily['Date'].iloc[-1])
+    period = choose_granularity(start, end)
+    points = resample_sales(daily, period)
+    if len(points) > max_points:
+        keep = lttb(points['Date'].to_numpy('datetime64[ns]').astype('int64'), points['Amount'], max_points)
+        points = points.iloc[keep]
+    return points, period
@@ -0,0 +1,229 @@
+"""Compact, dictionary-encoded in-memory form of the sale report.
+
+Every text column (Category, ship-state, Status, Month, Fulfilment, SKU,
+Style, ...) is stored as small integer codes into a sorted lookup table of
+its distinct values, with -1 for missing. Date is an int32 day number
+(days since 1970-01-01, NAT_DAY when missing); the cleaned reports carry
+dates only, so nothing is lost. Amount is float64 (float32 would already
+round a value like 376.53) and other numeric columns are kept as they are.
+
+Group-bys run as np.bincount over the codes. Amount sums are rounded back
+to cents (AMOUNT_DECIMALS), so they come out as the exact totals of the
+2-decimal amounts, whatever the order they were added in.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+DATE_COLUMN = 'Date'
+AMOUNT_COLUMN = 'Amount'
+# Amounts are in currency units with cents
+AMOUNT_DECIMALS = 2
+NAT_DAY = np.iinfo(np.int32).min
+
+# Combined group keys are renumbered before they could outgrow int64
+MAX_KEY_SPAN = 2 ** 62
+
+
+def code_dtype(n_values):
+    """Smallest signed integer type holding codes 0..n_values-1 and -1."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def encode_text(values):
+    """(codes, lookup) for a text or categorical column; lookup is sorted."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        if not values.cat.categories.is_monotonic_increasing:
+            values = values.cat.reorder_categories(values.cat.categories.sort_values())
+        codes, lookup = values.cat.codes.to_numpy(), values.cat.categories.to_numpy(dtype=object)
+    else:
+        # Mixed str/number text columns are stored as their string form
+        values = values.where(values.isna(), values.astype(str))
+        codes, uniques = pd.factorize(values, sort=True)
+        lookup = np.asarray(uniques, dtype=object)
+    return codes.astype(code_dtype(len(lookup)), copy=False), lookup
+
+
+def day_numbers(values):
+    """int32 days since 1970-01-01 for a date column, NAT_DAY where missing."""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, errors='coerce')
+    days = values.to_numpy('datetime64[ns]').astype('datetime64[D]')
+    return np.where(np.isnat(days), NAT_DAY, days.view('int64')).astype(np.int32)
+
+
+def dates_from_days(days):
+    dates = np.asarray(days).astype('int64').astype('datetime64[D]').astype('datetime64[ns]')
+    dates[np.asarray(days) == NAT_DAY] = np.datetime64('NaT')
+    return dates
+
+
+def month_numbers(days):
+    """int32 months since 1970-01 (monthly Period ordinals) for day numbers, NAT_DAY where missing."""
+    days = np.asarray(days)
+    months = days.astype('int64').astype('datetime64[D]').astype('datetime64[M]').view('int64')
+    return np.where(days == NAT_DAY, NAT_DAY, months).astype(np.int32)
+
+
+def offset_codes(numbers, missing):
+    """(codes, smallest, size) for integer keys such as day numbers.
+
+    Codes are offsets from the smallest present number, -1 for missing.
+    """
+    present = numbers != missing
+    if not present.any():
+        return np.full(len(numbers), -1, dtype=np.int64), 0, 0
+    low = int(numbers[present].min())
+    codes = np.where(present, numbers.astype('int64') - low, -1)
+    return codes, low, int(codes.max()) + 1
+
+
+# --- Group-by kernels ---
+
+def group_sums(codes, n_groups, weights=None, decimals=None):
+    """Per-group sums of `weights` (row counts without), and which groups have rows.
+
+    Rows with a negative code (missing key) are skipped, and NaN weights
+    count as zero, as in a pandas group-by. With `decimals`, sums are
+    rounded to that many places (AMOUNT_DECIMALS for amounts).
+    """
+    codes = np.asarray(codes)
+    keep = codes >= 0
+    if not keep.all():
+        codes = codes[keep]
+        weights = None if weights is None else np.asarray(weights)[keep]
+    counts = np.bincount(codes, minlength=n_groups)
+    if weights is None:
+        return counts, counts > 0
+    weights = np.asarray(weights, dtype='float64')
+    missing = np.isnan(weights)
+    if missing.any():
+        weights = np.where(missing, 0.0, weights)
+    sums = np.bincount(codes, weights=weights, minlength=n_groups)
+    if decimals is not None:
+        sums = np.round(sums, decimals)
+    return sums, counts > 0
+
+
+def group_rows(keys):
+    """Group id of every row for the combinations of several (codes, size) keys.
+
+    Groups are numbered in order of first appearance and missing codes
+    form groups of their own (as with dropna=False). Returns the group ids
+    and the first row of each group.
+    """
+    n_rows = len(keys[0][0]) if keys else 0
+    combined = np.zeros(n_rows, dtype=np.int64)
+    span = 1
+    for codes, size in keys:
+        if span * (size + 1) > MAX_KEY_SPAN:
+            combined, uniques = pd.factorize(combined)
+            combined, span = combined.astype(np.int64), max(len(uniques), 1)
+        combined = combined * (size + 1) + (np.asarray(codes, dtype=np.int64) + 1)
+        span *= size + 1
+    group_ids, _ = pd.factorize(combined)
+    _, first_rows = np.unique(group_ids, return_index=True)
+    return group_ids, first_rows
+
+
+class EncodedTable:
+    """Column arrays of a sale report, text columns dictionary-encoded."""
+
+    def __init__(self, columns, lookups, n_rows):
+        self.columns = columns
+        self.lookups = lookups
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_frame(cls, df):
+        columns, lookups = {}, {}
+        for name in df.columns:
+            values = df[name]
+            if name == DATE_COLUMN:
+                columns[name] = day_numbers(values)
+            elif name == AMOUNT_COLUMN:
+                columns[name] = pd.to_numeric(values, errors='coerce').to_numpy('float64')
+            elif isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object:
+                columns[name], lookups[name] = encode_text(values)
+            else:
+                columns[name] = values.to_numpy()
+        return cls(columns, lookups, len(df))
+
+    def __len__(self):
+        return self.n_rows
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the arrays and lookup tables, strings included."""
+        size = sum(array.nbytes for array in self.columns.values())
+        for lookup in self.lookups.values():
+            size += lookup.nbytes + sum(sys.getsizeof(value) for value in lookup)
+        return size
+
+    def key(self, name):
+        """(codes, number of codes) to group by column `name`."""
+        if name in self.lookups:
+            return self.columns[name], len(self.lookups[name])
+        if name == DATE_COLUMN:
+            codes, _, size = offset_codes(self.columns[name], NAT_DAY)
+            return codes, size
+        codes, uniques = pd.factorize(self.columns[name])
+        return codes, len(uniques)
+
+    def sums_by(self, name, weights=None, decimals=None):
+        """Sums of `weights` (row counts without) per value of column `name`, sorted by value."""
+        if name in self.lookups:
+            codes, values = self.columns[name], self.lookups[name]
+        else:
+            codes, values = pd.factorize(self.columns[name], sort=True)
+        sums, present = group_sums(codes, len(values), weights, decimals)
+        return pd.Series(sums[present], index=pd.Index(np.asarray(values, dtype=object)[present], name=name))
+
+    def values(self, name):
+        """Sorted distinct non-missing values of a text column."""
+        _, present = group_sums(self.columns[name], len(self.lookups[name]))
+        return self.lookups[name][present].tolist()
+
+    def decode(self, name, rows=None):
+        """Column `name` as pandas would hold it (text as a categorical), optionally just `rows`."""
+        array = self.columns[name] if rows is None else self.columns[name][rows]
+        if name in self.lookups:
+            return pd.Categorical.from_codes(array, categories=pd.Index(self.lookups[name], dtype=object),
+                                             validate=False)
+        if name == DATE_COLUMN:
+            return dates_from_days(array)
+        return array
+
+    def rows_where(self, selection):
+        """Ids of the rows matching every non-empty {text column: values} entry.
+
+        Returns None when nothing is filtered (all rows match).
+        """
+        mask = None
+        for name, values in selection.items():
+            if not values:
+                continue
+            codes = pd.Index(self.lookups[name]).get_indexer(list(values))
+            matches = np.isin(self.columns[name], codes[codes >= 0])
+            mask = matches if mask is None else mask & matches
+        return None if mask is None else np.flatnonzero(mask)
+
+    def take(self, rows, columns=None):
+        """A new table of just `rows` (and `columns`), sharing the lookups."""
+        names = list(self.columns) if columns is None else columns
+        return EncodedTable({name: self.columns[name][rows] for name in names},
+                            {name: self.lookups[name] for name in names if name in self.lookups}, len(rows))
+
+    def to_frame(self, rows=None, columns=None):
+        names = list(self.columns) if columns is None else columns
+        return pd.DataFrame({name: self.decode(name, rows) for name in names})
@@ -0,0 +1,297 @@
+"""Background exports of the rows behind a filter selection, or a deep-dive report on them.
+
+    POST /exports             {"kind": "rows" | "report", "format": "csv" | "parquet",
+                               "months": [...], "categories": [...], "regions": [...]}
+    GET  /exports/<id>        job status: queued, running, done or failed
+    GET  /exports/<id>/file   the finished file
+
+Jobs run on a small local thread pool, not on the Dash workers' request
+path. A rows export writes the matching rows EXPORT_CHUNK_ROWS at a time,
+appending each chunk to the CSV or to a Parquet row group. A report merges
+the deep-dive partial aggregates of each chunk. Either way no more than
+one chunk is decoded at once. Finished files are kept in EXPORT_DIR, named
+after the kind, format, selection and data version. A repeated request is
+served from disk, even after a restart, until the data changes.
+EXPORT_CACHE_MB bounds the directory and drops the least recently used
+files first. A finished job is forgotten EXPORT_JOB_TTL seconds after it
+was last looked at or downloaded. Until then, and while any worker has
+used its file within that time, the file is not deleted: the directory
+can go over EXPORT_CACHE_MB for a while rather than lose a file a client
+was just told to fetch.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+import flask
+import numpy as np
+
+from result_cache import normalize_selection
+from deep_dive_analysis import (fulfillment_column, table_aggregates, merge_aggregates, finalize_aggregates,
+                                print_report)
+from instrumentation import metrics
+
+EXPORT_DIR = os.environ.get('EXPORT_DIR') or 'exports'
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS') or 2)
+EXPORT_CACHE_MB = float(os.environ.get('EXPORT_CACHE_MB') or 512)
+EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS') or 100_000)
+EXPORT_JOB_TTL = float(os.environ.get('EXPORT_JOB_TTL') or 3600)
+
+# Output formats per export kind; the first one is the default
+FORMATS = {'rows': ['csv', 'parquet'], 'report': ['txt']}
+MIMETYPES = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet', 'txt': 'text/plain'}
+# Request fields and the text columns they filter
+FILTERS = {'months': 'Month', 'categories': 'Category', 'regions': 'ship-state'}
+REPORT_COLUMNS = ['Date', 'Status', 'Amount', 'Qty']
+
+
+def export_id(kind, fmt, selection, version):
+    key = json.dumps([kind, fmt, selection, version])
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def row_chunks(rows, chunk_rows):
+    """Slices of `rows`; at least one, possibly empty, so every export writes a file."""
+    for start in range(0, max(len(rows), 1), chunk_rows):
+        yield rows[start:start + chunk_rows]
+
+
+def write_rows(table, rows, path, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in row_chunks(rows, chunk_rows):
+                batch = pa.Table.from_pandas(table.to_frame(chunk), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, batch.schema)
+                writer.write_table(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            for i, chunk in enumerate(row_chunks(rows, chunk_rows)):
+                table.to_frame(chunk).to_csv(f, header=(i == 0), index=False)
+    return len(rows)
+
+
+def write_report(table, rows, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    fulfilled_by = fulfillment_column(list(table.columns))
+    columns = REPORT_COLUMNS + ([fulfilled_by] if fulfilled_by else [])
+    agg = None
+    for chunk in row_chunks(rows, chunk_rows):
+        agg = merge_aggregates(agg, table_aggregates(table.take(chunk, columns), fulfilled_by))
+    with open(path, 'w', encoding='utf-8') as f:
+        print_report(finalize_aggregates(agg, fulfilled_by), file=f)
+    return len(rows)
+
+
+class ExportJob:
+    def __init__(self, job_id, kind, fmt, selection, version, path):
+        self.id = job_id
+        self.kind = kind
+        self.format = fmt
+        self.selection = selection
+        self.version = version
+        self.path = path
+        self.status = 'queued'
+        self.rows = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        # Last submit, status check or download
+        self.accessed = self.created
+
+    def to_dict(self):
+        done = self.status == 'done'
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'format': self.format,
+            'filters': dict(zip(FILTERS, map(list, self.selection))),
+            'data_version': self.version,
+            'status': self.status,
+            'rows': self.rows,
+            'bytes': os.path.getsize(self.path) if done and os.path.exists(self.path) else None,
+            'error': self.error,
+            'created': self.created,
+            'finished': self.finished,
+            'file': flask.url_for('exports.download', job_id=self.id) if done else None,
+        }
+
+
+class ExportService:
+    """Export jobs over the live dataset, run on a thread pool and cached on disk.
+
+    `get_dataset()` returns the dataset to export from. A job reads the one
+    current when it was submitted, so a data reload never mixes versions
+    within one file.
+    """
+
+    def __init__(self, get_dataset, directory=EXPORT_DIR, workers=EXPORT_WORKERS,
+                 max_bytes=int(EXPORT_CACHE_MB * 1024 * 1024), chunk_rows=EXPORT_CHUNK_ROWS,
+                 job_ttl=EXPORT_JOB_TTL):
+        self.get_dataset = get_dataset
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_rows = chunk_rows
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export')
+
+    def submit(self, kind, fmt, months=None, categories=None, regions=None):
+        """Job for this export: an existing one, one already on disk, or a newly queued one."""
+        dataset = self.get_dataset()
+        selection = normalize_selection(months, categories, regions)
+        job_id = export_id(kind, fmt, selection, dataset.version)
+        with self._lock:
+            self._expire()
+            job = self.jobs.get(job_id)
+            if job is not None and job.status != 'failed' and (job.status != 'done' or os.path.exists(job.path)):
+                self._touch(job)
+                return job
+            job = ExportJob(job_id, kind, fmt, selection, dataset.version,
+                            os.path.join(self.directory, f"{job_id}.{fmt}"))
+            self.jobs[job_id] = job
+            if os.path.exists(job.path):
+                job.status, job.finished = 'done', os.path.getmtime(job.path)
+                self._touch(job)
+                return job
+        self.pool.submit(self._run, job, dataset)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire()
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status == 'done' and not os.path.exists(job.path):
+                # Deleted from the disk cache since; it has to be requested again
+                del self.jobs[job_id]
+                return None
+            self._touch(job)
+        return job
+
+    def _touch(self, job):
+        # The file's mtime marks it as recently used for every worker sharing the directory
+        job.accessed = time.time()
+        if job.status == 'done':
+            try:
+                os.utime(job.path)
+            except OSError:
+                pass
+
+    def _expire(self):
+        """Forget finished jobs unused for job_ttl seconds (call with the lock held)."""
+        cutoff = time.time() - self.job_ttl
+        for job_id, job in list(self.jobs.items()):
+            if job.status in ('done', 'failed') and job.accessed < cutoff:
+                del self.jobs[job_id]
+
+    def _run(self, job, dataset):
+        job.status = 'running'
+        tmp_path = job.path + '.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            table = dataset.sales
+            with metrics.stage('export_filter'):
+                rows = table.rows_where({FILTERS[name]: values for name, values in zip(FILTERS, job.selection)})
+            if rows is None:
+                rows = np.arange(len(table))
+            with metrics.stage(f'export_{job.kind}'):
+                if job.kind == 'report':
+                    job.rows = write_report(table, rows, tmp_path, self.chunk_rows)
+                else:
+                    job.rows = write_rows(table, rows, tmp_path, job.format, self.chunk_rows)
+            os.replace(tmp_path, job.path)
+            job.status = 'done'
+        except Exception as e:
+            job.status, job.error = 'failed', str(e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            job.finished = time.time()
+        self.prune()
+
+    def prune(self):
+        """Delete the least recently used files until the directory fits in max_bytes.
+
+        Files of jobs this service still knows, and files any worker has used
+        within job_ttl seconds, are kept even if that leaves it over.
+        """
+        with self._lock:
+            self._expire()
+            in_use = {job.path for job in self.jobs.values()}
+        try:
+            files = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                     if not name.endswith('.tmp')]
+            files = sorted((os.stat(path).st_mtime, os.path.getsize(path), path) for path in files)
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        recent = time.time() - self.job_ttl
+        for mtime, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path in in_use or mtime >= recent:
+                continue
+            try:
+                # A download already sending this file keeps its open handle
+                # (where the OS refuses to delete an open file, it is skipped)
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def blueprint(self):
+        bp = flask.Blueprint('exports', __name__, url_prefix='/exports')
+
+        @bp.route('', methods=['POST'])
+        def create():
+            spec = flask.request.get_json(silent=True) or {}
+            kind = spec.get('kind', 'rows')
+            if kind not in FORMATS:
+                return flask.jsonify(error=f"kind must be one of {', '.join(FORMATS)}"), 400
+            fmt = spec.get('format', FORMATS[kind][0])
+            if fmt not in FORMATS[kind]:
+                return flask.jsonify(error=f"{kind} exports come as {', '.join(FORMATS[kind])}"), 400
+            filters = {name: spec.get(name) for name in FILTERS}
+            if any(values is not None and not isinstance(values, list) for values in filters.values()):
+                return flask.jsonify(error=f"{', '.join(FILTERS)} must be lists of values"), 400
+            if fmt == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+                return flask.jsonify(error="Parquet exports need pyarrow installed"), 400
+
+            job = self.submit(kind, fmt, **filters)
+            response = flask.jsonify(job.to_dict())
+            response.status_code = 200 if job.status == 'done' else 202
+            response.headers['Location'] = flask.url_for('exports.status', job_id=job.id)
+            return response
+
+        @bp.route('/<job_id>')
+        def status(job_id):
+            job = self.get(job_id)
+            if job is None:
+                return flask.jsonify(error="Unknown or expired export"), 404
+            return flask.jsonify(job.to_dict())
+
+        @bp.route('/<job_id>/file')
+        def download(job_id):
+            job = self.get(job_id)
+            if job is None:
+                return flask.jsonify(error="Unknown or expired export"), 404
+            if job.status != 'done':
+                return flask.jsonify(job.to_dict()), 409
+            # Sent from disk in blocks, never read whole into memory
+            return flask.send_file(os.path.abspath(job.path), mimetype=MIMETYPES[job.format], as_attachment=True,
+                                   download_name=f"sales-{job.kind}-{job.id}.{job.format}")
+
+        return bp
@@ -0,0 +1,165 @@
+"""Dashboard figures as plain dicts, filled into skeletons built once.
+
+plotly.express and the figure validators cost far more per request than
+the few dozen numbers a chart carries. Each chart's skeleton (trace
+styling plus the dark-theme layout, template included) is built once with
+express, exactly as the callbacks used to build it, and kept as
+JSON-ready dicts. Skeletons are built on first use rather than at import,
+which keeps plotly.express off the app's start-up path; warm_up() builds
+them all ahead of the first request. A request copies the one trace dict, sets its data
+arrays and shares the layout. Dash sends such dicts as they are.
+
+dumps() serializes a figure with orjson (NumPy arrays natively) when it
+is installed and with Plotly's encoder otherwise. Dash also picks orjson
+up on its own for every response once it is installed.
+"""
+import os
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+from plotly.utils import PlotlyJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+TEMPLATE = "plotly_dark"
+TRANSPARENT = 'rgba(0,0,0,0)'
+
+
+def _skeleton(fig, *data_keys):
+    """JSON-ready figure dict with its trace's data arrays left out."""
+    spec = json.loads(fig.to_json())
+    for trace in spec['data']:
+        for key in data_keys:
+            trace.pop(key, None)
+    return spec
+
+
+def _build_category_bar():
+    import plotly.express as px
+
+    sample = pd.DataFrame({'Category': ['-'], 'Amount': [0.0]})
+    fig_cat = px.bar(sample, x='Category', y='Amount', title='Sales by Category', template=TEMPLATE)
+    fig_cat.update_layout(paper_bgcolor=TRANSPARENT, plot_bgcolor=TRANSPARENT, font=dict(color='white'))
+    fig_cat.update_traces(marker_color='#3a7bd5')
+    return _skeleton(fig_cat, 'x', 'y')
+
+
+def _build_status_pie():
+    import plotly.express as px
+
+    sample = pd.DataFrame({'Status': ['-'], 'Count': [0]})
+    fig_pie = px.pie(sample, values='Count', names='Status', title='Order Status Distribution', template=TEMPLATE)
+    fig_pie.update_layout(paper_bgcolor=TRANSPARENT, font=dict(color='white'))
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    return _skeleton(fig_pie, 'labels', 'values')
+
+
+def _build_region_bar():
+    import plotly.express as px
+
+    sample = pd.DataFrame({'ship-state': ['-'], 'Amount': [0.0]})
+    fig_map = px.bar(sample, x='Amount', y='ship-state', orientation='h', title='Top 10 States by Revenue',
+                     template=TEMPLATE)
+    fig_map.update_layout(paper_bgcolor=TRANSPARENT, plot_bgcolor=TRANSPARENT, font=dict(color='white'),
+                          yaxis=dict(autorange="reversed"))
+    fig_map.update_traces(marker_color='#00d2ff')
+    return _skeleton(fig_map, 'x', 'y')
+
+
+def _build_sales_trend():
+    import plotly.express as px
+
+    sample = pd.DataFrame({'Date': pd.to_datetime(['2022-01-01']), 'Amount': [0.0]})
+    fig_trend = px.line(sample, x='Date', y='Amount', title='Sales Trend', template=TEMPLATE)
+    fig_trend.update_layout(paper_bgcolor=TRANSPARENT, plot_bgcolor=TRANSPARENT, font=dict(color='white'))
+    fig_trend.update_traces(line=dict(color='#00d2ff', width=3))
+    return _skeleton(fig_trend, 'x', 'y')
+
+
+def _build_no_data(kind):
+    import plotly.express as px
+
+    return json.loads(getattr(px, kind)(title='No Data', template=TEMPLATE).to_json())
+
+
+_BUILDERS = {
+    'CATEGORY_BAR': _build_category_bar,
+    'STATUS_PIE': _build_status_pie,
+    'REGION_BAR': _build_region_bar,
+    'SALES_TREND': _build_sales_trend,
+    'NO_DATA_BAR': lambda: _build_no_data('bar'),
+    'NO_DATA_PIE': lambda: _build_no_data('pie'),
+    'NO_DATA_LINE': lambda: _build_no_data('line'),
+}
+_build_lock = threading.Lock()
+
+
+def _reset_lock():
+    # A fork taken mid-build would copy the lock held by a thread that is gone
+    global _build_lock
+    _build_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_lock)
+
+
+def __getattr__(name):
+    # Skeleton constants (CATEGORY_BAR, NO_DATA_PIE, ...) are built on first access
+    if name not in _BUILDERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _build_lock:
+        if name not in globals():
+            globals()[name] = _BUILDERS[name]()
+    return globals()[name]
+
+
+def warm_up():
+    """Build every skeleton now, e.g. on a background thread at start-up."""
+    for name in _BUILDERS:
+        __getattr__(name)
+
+
+def column(values):
+    """A frame column as trace data: numbers as arrays, dates as ISO strings, text as a list."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return np.datetime_as_string(values.to_numpy('datetime64[ns]'), unit='s').tolist()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.to_numpy()
+    return values.tolist()
+
+
+def fill(skeleton, layout=None, **data):
+    """Figure from a skeleton with its trace's data set (and optionally another layout)."""
+    trace = dict(skeleton['data'][0], **data)
+    return {'data': [trace], 'layout': layout if layout is not None else skeleton['layout']}
+
+
+def with_title(layout, text, x_range=None):
+    """Copy of a shared layout with a new title and, optionally, an x-axis range."""
+    layout = dict(layout, title=dict(layout['title'], text=text))
+    if x_range is not None:
+        layout['xaxis'] = dict(layout['xaxis'], range=list(x_range))
+    return layout
+
+
+def nbytes(fig):
+    """Rough size of a figure's own data, without serializing it (the layout is shared)."""
+    size = 0
+    for trace in fig['data']:
+        for value in trace.values():
+            if isinstance(value, np.ndarray):
+                size += value.nbytes
+            elif isinstance(value, list):
+                size += sum(len(item) if isinstance(item, str) else 8 for item in value)
+    return size
+
+
+def dumps(fig):
+    if orjson is not None:
+        return orjson.dumps(fig, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(fig, cls=PlotlyJSONEncoder).encode()
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """Inverted index from dimension values to the rows holding them.
+
+    Each value maps to a sorted int32 array of row ids (a compressed bitmap).
+    A selection is the union of the posting lists within each dimension and
+    the intersection across dimensions, smallest list first, so its cost
+    scales with the number of matching rows rather than the table size.
+    Rows with a missing value are never selected, matching Series.isin.
+    """
+
+    def __init__(self, df, dimensions):
+        self.n_rows = len(df)
+        self.postings = {}
+        for dim in dimensions:
+            codes, uniques = pd.factorize(df[dim])
+            order = np.argsort(codes, kind='stable').astype(np.int32)
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.postings[dim] = {
+                value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)
+            }
+
+    def values(self, dim):
+        return list(self.postings[dim])
+
+    def rows(self, dim, values):
+        """Sorted row ids whose `dim` is any of `values`."""
+        lists = [self.postings[dim][v] for v in dict.fromkeys(values) if v in self.postings[dim]]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        if len(lists) == 1:
+            return lists[0]
+        # Postings of distinct values are disjoint, so no dedup is needed
+        return np.sort(np.concatenate(lists))
+
+    def select(self, selection):
+        """Row ids matching every non-empty {dimension: values} entry.
+
+        Returns None when nothing is filtered (all rows match).
+        """
+        lists = [self.rows(dim, values) for dim, values in selection.items() if values]
+        if not lists:
+            return None
+        lists.sort(key=len)
+        result = lists[0]
+        for other in lists[1:]:
+            if not len(result):
+                break
+            # Binary-search each surviving id in the longer list
+            pos = np.searchsorted(other, result).clip(max=max(len(other) - 1, 0))
+            result = result[other[pos] == result] if len(other) else result[:0]
+        return result
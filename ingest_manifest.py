@@ -0,0 +1,125 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+# Lives in the cleaned output directory, one entry per source file name
+MANIFEST_NAME = 'manifest.json'
+READ_BLOCK = 1024 * 1024
+
+
+def manifest_path(out_dir):
+    return os.path.join(out_dir, MANIFEST_NAME)
+
+
+def load_manifest(out_dir):
+    try:
+        with open(manifest_path(out_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = manifest_path(out_dir)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def fingerprint(file_path, prefix_size=None):
+    """Size, mtime and SHA-256 of a file, read in one pass.
+
+    With prefix_size, also returns the digest of the first prefix_size bytes
+    and whether they end on a line break, to tell an append from a rewrite.
+    """
+    stat = os.stat(file_path)
+    hasher = hashlib.sha256()
+    result = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    read = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            limit = READ_BLOCK
+            if prefix_size is not None and read < prefix_size:
+                limit = min(limit, prefix_size - read)
+            block = f.read(limit)
+            if not block:
+                break
+            hasher.update(block)
+            read += len(block)
+            if prefix_size is not None and read == prefix_size:
+                result['prefix_sha256'] = hasher.copy().hexdigest()
+                result['prefix_ends_line'] = block.endswith(b'\n')
+    result['sha256'] = hasher.hexdigest()
+    return result
+
+
+# --- Hashes of rows already written to a cleaned CSV ---
+
+def row_hashes_path(output_path):
+    return os.path.splitext(output_path)[0] + '.rowhashes.npy'
+
+
+def load_row_hashes(output_path):
+    """Sorted uint64 hashes of every row in output_path, or None if unknown."""
+    try:
+        return np.load(row_hashes_path(output_path))
+    except (OSError, ValueError):
+        return None
+
+
+def save_row_hashes(output_path, hashes):
+    path = row_hashes_path(output_path)
+    tmp_path = path + '.tmp.npy'
+    np.save(tmp_path, np.sort(np.asarray(hashes, dtype=np.uint64)))
+    os.replace(tmp_path, path)
+
+
+def contains(sorted_hashes, hashes):
+    """Boolean mask of which hashes are already in sorted_hashes."""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    if sorted_hashes is None or len(sorted_hashes) == 0:
+        return np.zeros(len(hashes), dtype=bool)
+    pos = np.searchsorted(sorted_hashes, hashes).clip(max=len(sorted_hashes) - 1)
+    return sorted_hashes[pos] == hashes
+
+
+def pipeline_version(schema, cleaner_version):
+    """Identifies the cleaning code and schema an output was produced with."""
+    key = json.dumps([cleaner_version, schema], sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def plan_update(file_path, output_path, previous, pipeline=None):
+    """Decide how to bring output_path up to date with file_path.
+
+    Returns (action, fingerprint) where action is 'skip' when the source is
+    unchanged, 'append' when rows were only added at the end since the last
+    run, and 'full' otherwise. An output produced by another `pipeline`
+    (cleaning code or schema) is always rebuilt in full. The fingerprint
+    records `pipeline` for the next run.
+    """
+    action, fp = _plan_update(file_path, output_path, previous, pipeline)
+    fp['pipeline'] = pipeline
+    return action, fp
+
+
+def _plan_update(file_path, output_path, previous, pipeline):
+    outputs_exist = os.path.exists(output_path)
+    if previous and outputs_exist and previous.get('pipeline') == pipeline:
+        stat = os.stat(file_path)
+        if stat.st_size == previous['size'] and stat.st_mtime_ns == previous['mtime_ns']:
+            return 'skip', dict(previous)
+
+        grew = stat.st_size > previous['size']
+        fp = fingerprint(file_path, prefix_size=previous['size'] if grew else None)
+        if fp['sha256'] == previous['sha256']:
+            return 'skip', fp
+        if (grew and fp.get('prefix_sha256') == previous['sha256'] and fp.get('prefix_ends_line')
+                and os.path.exists(row_hashes_path(output_path))):
+            return 'append', fp
+        return 'full', fp
+
+    return 'full', fingerprint(file_path)
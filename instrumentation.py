@@ -0,0 +1,268 @@
+"""Optional timings, row counts and sizes for the dashboard's hot paths.
+
+Off unless ENABLE_METRICS=1. When off, stage() hands back a shared no-op
+context manager and instrument() returns the callback unchanged, so the
+cost is an attribute lookup per stage. When on, every instrumented
+callback records how long each stage took, how many rows it produced and
+how many bytes it handed on, and /metrics serves it all in the Prometheus
+text format.
+
+Set PROFILE_SLOW_MS (independently of ENABLE_METRICS) to profile each
+instrumented callback and keep the profile of any call slower than that
+many milliseconds in PROFILE_DIR: pyinstrument HTML when it is installed,
+cProfile stats (open with `python -m pstats` or snakeviz) otherwise.
+"""
+import os
+import time
+import threading
+import functools
+import contextlib
+from collections import defaultdict
+
+METRICS_ENABLED = os.environ.get('ENABLE_METRICS', '').lower() in ('1', 'true', 'yes')
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS') or 0)
+PROFILE_DIR = os.environ.get('PROFILE_DIR') or 'profiles'
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = contextlib.nullcontext()
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Summary:
+    def __init__(self):
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+
+
+class _Trace:
+    """Stage totals for one callback call; a stage may run more than once."""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = defaultdict(float)
+        self.rows = {}
+        self.bytes = {}
+
+
+class Metrics:
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.histograms = defaultdict(_Histogram)
+        self.summaries = defaultdict(_Summary)
+        self.gauges = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # --- Recording ---
+
+    def stage(self, name):
+        """Time a block as stage `name` of the current callback."""
+        if not self.enabled:
+            return _NOOP
+        return self._timed_stage(name)
+
+    @contextlib.contextmanager
+    def _timed_stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            trace = getattr(self._local, 'trace', None)
+            if trace is not None:
+                trace.seconds[name] += elapsed
+            else:
+                self._observe('eah_stage_seconds', {'callback': '', 'stage': name}, elapsed)
+
+    def rows(self, stage, n):
+        """Rows a stage produced (the last count wins within one call)."""
+        if self.enabled:
+            self._record('rows', stage, n)
+
+    def nbytes(self, stage, n):
+        """Bytes a stage allocated or handed on, e.g. a frame or a payload."""
+        if self.enabled:
+            self._record('bytes', stage, n)
+
+    def _record(self, kind, stage, n):
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            getattr(trace, kind)[stage] = n
+        else:
+            self._observe_summary(f'eah_stage_{kind}', {'callback': '', 'stage': stage}, n)
+
+    def set_gauge(self, name, value, **labels):
+        if self.enabled:
+            with self._lock:
+                self.gauges[(name, _label_key(labels))] = value
+
+    def add_collector(self, collect):
+        """Register a function returning {metric name: value}, read on every scrape."""
+        self._collectors.append(collect)
+
+    def _observe(self, name, labels, value):
+        with self._lock:
+            self.histograms[(name, _label_key(labels))].observe(value)
+
+    def _observe_summary(self, name, labels, value):
+        with self._lock:
+            self.summaries[(name, _label_key(labels))].observe(value)
+
+    def _finish(self, trace, elapsed):
+        self._observe('eah_callback_seconds', {'callback': trace.name}, elapsed)
+        for stage, seconds in trace.seconds.items():
+            self._observe('eah_stage_seconds', {'callback': trace.name, 'stage': stage}, seconds)
+        for stage, n in trace.rows.items():
+            self._observe_summary('eah_stage_rows', {'callback': trace.name, 'stage': stage}, n)
+        for stage, n in trace.bytes.items():
+            self._observe_summary('eah_stage_bytes', {'callback': trace.name, 'stage': stage}, n)
+
+    # --- Callbacks ---
+
+    def instrument(self, name):
+        """Decorator recording a Dash callback's stages (and profiling it if asked)."""
+        def decorate(func):
+            if not self.enabled and not PROFILE_SLOW_MS:
+                return func
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                trace = _Trace(name) if self.enabled else None
+                outer, self._local.trace = getattr(self._local, 'trace', None), trace
+                profiler = _start_profiler() if PROFILE_SLOW_MS else None
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    self._local.trace = outer
+                    if profiler is not None:
+                        _stop_profiler(profiler, name, elapsed)
+                    if trace is not None:
+                        self._finish(trace, elapsed)
+            return wrapper
+        return decorate
+
+    def instrument_server(self, server):
+        """Time every Flask request and size its response, Dash serialization included."""
+        if not self.enabled:
+            return
+        import flask
+
+        @server.before_request
+        def _start_timer():
+            flask.g.eah_request_start = time.perf_counter()
+
+        @server.after_request
+        def _record_request(response):
+            start = getattr(flask.g, 'eah_request_start', None)
+            if start is not None:
+                labels = {'path': flask.request.path}
+                self._observe('eah_http_request_seconds', labels, time.perf_counter() - start)
+                if not response.direct_passthrough:
+                    self._observe_summary('eah_http_response_bytes', labels, response.calculate_content_length() or 0)
+            return response
+
+    # --- Exposition ---
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = ['# TYPE eah_metrics_enabled gauge', f'eah_metrics_enabled {int(self.enabled)}']
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            for (name, labels), hist in sorted(self.histograms.items()):
+                declare(name, 'histogram')
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(labels, le=bound)} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {hist.sum}')
+                lines.append(f'{name}_count{_labels(labels)} {hist.count}')
+            for (name, labels), summary in sorted(self.summaries.items()):
+                declare(name, 'summary')
+                lines.append(f'{name}_sum{_labels(labels)} {summary.sum}')
+                lines.append(f'{name}_count{_labels(labels)} {summary.count}')
+            for (name, labels), value in sorted(self.gauges.items()):
+                declare(name, 'gauge')
+                lines.append(f'{name}{_labels(labels)} {value}')
+        for collect in self._collectors:
+            for name, value in collect().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    declare(name, 'gauge')
+                    lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _labels(key, **extra):
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+# --- Slow-callback profiling ---
+
+def _start_profiler():
+    try:
+        from pyinstrument import Profiler
+        profiler = Profiler()
+    except ImportError:
+        import cProfile
+        profiler = cProfile.Profile()
+    if hasattr(profiler, 'enable'):
+        profiler.enable()
+    else:
+        profiler.start()
+    return profiler
+
+
+def _stop_profiler(profiler, name, elapsed):
+    if hasattr(profiler, 'disable'):
+        profiler.disable()
+    else:
+        profiler.stop()
+    if elapsed * 1000 < PROFILE_SLOW_MS:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1000)}ms")
+    if hasattr(profiler, 'dump_stats'):
+        profiler.dump_stats(stem + '.prof')
+    else:
+        with open(stem + '.html', 'w') as f:
+            f.write(profiler.output_html())
+
+
+metrics = Metrics()
@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+
+
+def normalize_selection(*selections):
+    """Cache key part for dropdown values: None, [] and reorderings all agree."""
+    return tuple(tuple(sorted(set(values or ()))) for values in selections)
+
+
+class _Flight:
+    """A computation in progress; waiters read its value (or error) once `done` is set."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by the total size of its entries.
+
+    Entries carry the data version they were computed from; switching to a
+    new version drops everything cached for the old one.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def set_version(self, version):
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.current_bytes = 0
+                self.version = version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_or_compute(self, key, compute):
+        """Cached value for key, else compute() -> (value, size) and cache it.
+
+        Threads asking for the same missing key at the same time wait for
+        one computation instead of each running their own, and get its
+        value even when it is too big to cache.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            flight = self._pending.get(key)
+            leader = flight is None
+            if leader:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return entry[0]
+                flight = self._pending[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            value, size = compute()
+            flight.value = value
+            self.put(key, value, size)
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+            flight.done.set()
+
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'version': self.version,
+            }
@@ -0,0 +1,110 @@
+"""Column types of the raw exports, so cleaning doesn't have to guess them.
+
+Each schema lists date columns with their exact format, numeric columns
+with the narrowest dtype that holds them (money always float64: float32
+can't hold an amount like 464.64 exactly), and text columns with few
+distinct values to keep as categoricals. Files without a schema fall back
+to the name-based heuristics in clean_data.coerce_columns.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Marketplace price columns shared by the May-2022 and March 2021 catalogs
+CATALOG_MRP_COLUMNS = ['MRP Old', 'Final MRP Old', 'Ajio MRP', 'Amazon MRP', 'Amazon FBA MRP',
+                       'Flipkart MRP', 'Limeroad MRP', 'Myntra MRP', 'Paytm MRP', 'Snapdeal MRP']
+
+AMAZON_SALE_REPORT = {
+    'dates': {'Date': '%m-%d-%y'},
+    'numeric': {'index': 'int32', 'Qty': 'int32', 'Amount': 'float64'},
+    'categorical': ['Status', 'Fulfilment', 'Sales Channel', 'ship-service-level', 'Category', 'Size',
+                    'Courier Status', 'currency', 'ship-state', 'ship-country', 'fulfilled-by'],
+}
+
+INTERNATIONAL_SALE_REPORT = {
+    'dates': {'DATE': '%m-%d-%y'},
+    'numeric': {'index': 'int32', 'PCS': 'int32', 'RATE': 'float64', 'GROSS AMT': 'float64'},
+    'categorical': ['Months', 'CUSTOMER', 'Size'],
+}
+
+MAY_2022 = {
+    'dates': {},
+    'numeric': {'index': 'int32', 'Weight': 'float32', 'TP': 'float64',
+                **{c: 'float64' for c in CATALOG_MRP_COLUMNS}},
+    'categorical': ['Catalog', 'Category'],
+}
+
+PL_MARCH_2021 = {
+    'dates': {},
+    'numeric': {'index': 'int32', 'Weight': 'float32', 'TP 1': 'float64', 'TP 2': 'float64',
+                **{c: 'float64' for c in CATALOG_MRP_COLUMNS}},
+    'categorical': ['Catalog', 'Category'],
+}
+
+SALE_REPORT = {
+    'dates': {},
+    'numeric': {'index': 'int32', 'Stock': 'int32'},
+    'categorical': ['Category', 'Size', 'Color'],
+}
+
+# Keyed by file name lowercased with only letters and digits kept, so
+# "Amazon Sale Report.csv" and "Amazon-Sale-Report.csv" both match
+SCHEMAS = {
+    'amazonsalereport': AMAZON_SALE_REPORT,
+    'internationalsalereport': INTERNATIONAL_SALE_REPORT,
+    'may2022': MAY_2022,
+    'plmarch2021': PL_MARCH_2021,
+    'salereport': SALE_REPORT,
+}
+
+
+def schema_key(filename):
+    stem = filename.rsplit('.', 1)[0] if filename.lower().endswith('.csv') else filename
+    return re.sub(r'[^a-z0-9]', '', stem.lower())
+
+
+def schema_for(filename):
+    return SCHEMAS.get(schema_key(filename))
+
+
+def read_dtypes(schema, header):
+    """read_csv dtype= argument for a file with these raw column names.
+
+    Only categoricals are typed at read: numeric columns are left to the C
+    parser, which is exact for clean columns, and coerced afterwards so
+    junk values become NaN instead of failing the read.
+    """
+    categorical = set(schema['categorical'])
+    return {name: 'category' for name in header if name.strip() in categorical}
+
+
+def _numeric(values, dtype):
+    values = pd.to_numeric(values, errors='coerce')
+    if np.issubdtype(np.dtype(dtype), np.integer):
+        # Integer columns with gaps or fractions stay float
+        if values.isna().any() or (values % 1 != 0).any():
+            return values.astype('float64')
+    return values.astype(dtype)
+
+
+def _date(values, fmt):
+    parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+    if parsed.isna().all() and values.notna().any():
+        # Export changed its date format: let pandas work it out
+        parsed = pd.to_datetime(values, errors='coerce')
+    return parsed
+
+
+def apply_schema(df, schema):
+    """Coerce df's columns (names already stripped) to the schema's types, in place."""
+    for col, fmt in schema['dates'].items():
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = _date(df[col], fmt)
+    for col, dtype in schema['numeric'].items():
+        if col in df.columns:
+            df[col] = _numeric(df[col], dtype)
+    for col in schema['categorical']:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
@@ -0,0 +1,70 @@
+"""Filtered cube slices shared by the dashboard's per-figure callbacks.
+
+One click on "Update Dashboard" fires a callback for the KPIs and one for
+each figure. Whichever arrives first slices the cube and submits every
+aggregation the dashboard needs to a thread pool; the others find the
+same Selection in the memo and wait only for the aggregate they render.
+pandas and NumPy release the GIL for much of a group-by, so the
+aggregations overlap instead of queuing behind one another.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from cube import slice_cube, kpis, daily_sales, category_sales, status_counts, state_sales
+from result_cache import ResultCache, normalize_selection
+from instrumentation import metrics
+
+AGGREGATION_WORKERS = int(os.environ.get('AGGREGATION_WORKERS') or min(4, os.cpu_count() or 1))
+
+
+def top_states(cube_slice):
+    return state_sales(cube_slice, top_n=10)
+
+
+# Everything the dashboard shows for one selection, by name
+AGGREGATIONS = {
+    'kpis': kpis,
+    'daily': daily_sales,
+    'category': category_sales,
+    'status': status_counts,
+    'states': top_states,
+}
+
+
+class Selection:
+    """A cube slice with its aggregations running (or done) on a pool."""
+
+    def __init__(self, cube_slice, pool):
+        self.cube_slice = cube_slice
+        self.has_data = not cube_slice.empty
+        self._futures = {name: pool.submit(func, cube_slice) for name, func in AGGREGATIONS.items()}
+
+    def result(self, name):
+        with metrics.stage('aggregate'):
+            return self._futures[name].result()
+
+
+class SelectionMemo:
+    """Bounded LRU of Selections keyed by the normalized filter values."""
+
+    def __init__(self, cube, index, max_bytes, workers=AGGREGATION_WORKERS, pool=None):
+        self.cube = cube
+        self.index = index
+        self.cache = ResultCache(max_bytes)
+        # Pass a pool to share it with the memos of other dataset versions
+        self.pool = pool or ThreadPoolExecutor(max_workers=workers, thread_name_prefix='aggregate')
+
+    def set_version(self, version):
+        self.cache.set_version(version)
+
+    def get(self, months=None, categories=None, regions=None):
+        key = normalize_selection(months, categories, regions)
+        return self.cache.get_or_compute(key, lambda: self._select(months, categories, regions))
+
+    def _select(self, months, categories, regions):
+        with metrics.stage('filter'):
+            cube_slice = slice_cube(self.cube, self.index, months, categories, regions)
+        metrics.rows('filter', len(cube_slice))
+        size = int(cube_slice.memory_usage(index=False).sum())
+        metrics.nbytes('filter', size)
+        return Selection(cube_slice, self.pool), size
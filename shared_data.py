@@ -0,0 +1,119 @@
+"""Publish the sale report as memory-mapped column arrays shared by all workers.
+
+One loader process encodes the report as an EncodedTable (text columns as
+integer codes, Date as day numbers, Amount as float64) and writes each of
+its arrays to a versioned directory of .npy files, with the lookup tables
+in meta.json. Dashboard workers attach with np.load(mmap_mode='r') and use
+the arrays as they are, so the OS page cache holds a single copy of the
+data no matter how many workers are running, and no worker re-encodes it.
+
+    python shared_data.py publish --dir /dev/shm/eah-sales
+    SHARED_DATA_DIR=/dev/shm/eah-sales gunicorn app:server -w 4
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+
+import numpy as np
+
+from data_loader import load_sales_data, add_month_column
+from encoded_table import EncodedTable
+
+# Text file in the shared directory naming the live version subdirectory
+CURRENT_FILE = 'CURRENT'
+META_FILE = 'meta.json'
+# Bump when the layout of a version directory changes
+FORMAT_VERSION = 2
+
+
+def current_version(shared_dir):
+    try:
+        with open(os.path.join(shared_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def publish(df, shared_dir, source=None, keep=2):
+    """Encode df (or take an EncodedTable) and make its arrays the live version under shared_dir.
+
+    The version directory is complete before CURRENT is switched to it, so
+    attaching workers never see a partial dataset. Only the newest `keep`
+    versions are kept; workers that still map an older one keep their pages
+    until they let go of them.
+    """
+    os.makedirs(shared_dir, exist_ok=True)
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    version_dir = os.path.join(shared_dir, version)
+    os.makedirs(version_dir)
+
+    table = df if isinstance(df, EncodedTable) else EncodedTable.from_frame(df)
+    columns = []
+    for i, (name, array) in enumerate(table.columns.items()):
+        filename = f"col_{i:03d}.npy"
+        np.save(os.path.join(version_dir, filename), np.ascontiguousarray(array), allow_pickle=False)
+        lookup = table.lookups.get(name)
+        columns.append({'name': name, 'file': filename,
+                        'lookup': None if lookup is None else [str(value) for value in lookup]})
+
+    with open(os.path.join(version_dir, META_FILE), 'w') as f:
+        json.dump({'format': FORMAT_VERSION, 'rows': len(table), 'columns': columns, 'source': source}, f)
+
+    tmp_current = os.path.join(shared_dir, CURRENT_FILE + '.tmp')
+    with open(tmp_current, 'w') as f:
+        f.write(version)
+    os.replace(tmp_current, os.path.join(shared_dir, CURRENT_FILE))
+
+    versions = sorted(d for d in os.listdir(shared_dir)
+                      if d.startswith('v') and os.path.isdir(os.path.join(shared_dir, d)))
+    for old in versions[:-keep]:
+        shutil.rmtree(os.path.join(shared_dir, old), ignore_errors=True)
+    return version_dir
+
+
+def attach(shared_dir, version=None):
+    """Map the published dataset as an EncodedTable without copying it.
+
+    Every array is a read-only view of a memory map; only the lookup tables
+    are loaded into the worker. Callers must not modify the arrays in place.
+    """
+    version = version or current_version(shared_dir)
+    if version is None:
+        raise FileNotFoundError(f"No dataset published in {shared_dir}")
+    version_dir = os.path.join(shared_dir, version)
+    with open(os.path.join(version_dir, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get('format') != FORMAT_VERSION:
+        raise ValueError(f"{version_dir} was published by another version of shared_data.py; publish again")
+
+    columns, lookups = {}, {}
+    for col in meta['columns']:
+        array = np.load(os.path.join(version_dir, col['file']), mmap_mode='r')
+        columns[col['name']] = array.view(np.ndarray)
+        if col['lookup'] is not None:
+            lookups[col['name']] = np.array(col['lookup'], dtype=object)
+    return EncodedTable(columns, lookups, meta['rows'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the cleaned sale report for shared serving.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    pub = sub.add_parser('publish', help="Load the cleaned data and publish it as the live version.")
+    pub.add_argument('--dir', required=True, help="Shared directory, ideally on tmpfs (e.g. /dev/shm/...)")
+    pub.add_argument('--csv', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                   'cleaned_data', 'cleaned_Amazon-Sale-Report.csv'))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = load_sales_data(args.csv)
+    add_month_column(df)
+    stat = os.stat(args.csv)
+    version_dir = publish(df, args.dir, source={'path': args.csv, 'size': stat.st_size,
+                                                'mtime_ns': stat.st_mtime_ns})
+    print(f"Published {len(df):,} rows to {version_dir} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
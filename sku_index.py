@@ -0,0 +1,183 @@
+"""SKU dimension joining sales to stock and marketplace price catalogs.
+
+The price catalogs (May-2022, P L March 2021) and the stock report (Sale
+Report) are folded into one table with a row per normalized SKU, held as
+plain arrays. Order rows are mapped to dimension row ids once, through a
+hash index looked up per distinct SKU rather than per row, and every
+enriched query after that is array indexing:
+
+    python sku_index.py [--data-dir cleaned_data]
+"""
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from data_loader import load_cleaned
+from schemas import CATALOG_MRP_COLUMNS
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cleaned_data')
+
+# Newest first: a SKU priced in several catalogs takes the newest price
+CATALOG_FILES = ['cleaned_May-2022.csv', 'cleaned_P  L March 2021.csv']
+STOCK_FILE = 'cleaned_Sale Report.csv'
+SALES_FILE = 'cleaned_Amazon-Sale-Report.csv'
+
+# Transfer price column, in order of preference ('TP 1' in the 2021 catalog)
+TP_COLUMNS = ['TP', 'TP 1']
+MARKETPLACE_COLUMNS = [c for c in CATALOG_MRP_COLUMNS if 'Old' not in c]
+# Normalized values standing for no SKU; clean_data fills missing text with 'Unknown'
+MISSING_SKUS = ['UNKNOWN', '']
+
+
+def normalize_sku(values):
+    """Stripped, upper-cased SKUs; NaN where the SKU is missing or clean_data's 'Unknown' placeholder."""
+    values = pd.Index(values)
+    skus = values.astype(str).str.strip().str.upper()
+    return skus.where(~(values.isna() | skus.isin(MISSING_SKUS)))
+
+
+def _numeric(values):
+    return pd.to_numeric(values, errors='coerce').astype('float64')
+
+
+class SkuDimension:
+    """One row per SKU with transfer price, marketplace MRPs and stock.
+
+    Row ids index the arrays directly; id -1 (unknown, missing or 'Unknown'
+    SKU) lands on a trailing all-NaN row, so lookups need no masking.
+    """
+
+    def __init__(self, skus, tp, mrp, stock):
+        self.skus = pd.Index(skus)
+        self.n = len(self.skus)
+        self._tp = np.append(tp, np.nan)
+        self._mrp = np.vstack([mrp, np.full((1, mrp.shape[1]), np.nan)])
+        self._stock = np.append(stock, np.nan)
+
+    @property
+    def tp(self):
+        return self._tp[:-1]
+
+    @property
+    def stock(self):
+        return self._stock[:-1]
+
+    def ids(self, values):
+        """Dimension row id of each SKU value (-1 when unknown), as int32.
+
+        Categorical or repetitive input is hashed once per distinct value.
+        """
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+        found = self.skus.get_indexer(normalize_sku(uniques)).astype(np.int32)
+        return np.where(codes >= 0, found[codes], -1).astype(np.int32)
+
+    def order_margins(self, orders, ids=None, amount='Amount', qty='Qty', sku='SKU'):
+        """Amount - TP * Qty per order row; NaN where the SKU has no TP.
+
+        Pass `ids` from an earlier ids() call to skip the SKU lookup.
+        """
+        if ids is None:
+            ids = self.ids(orders[sku])
+        cost = self._tp[ids] * orders[qty].to_numpy('float64', na_value=np.nan)
+        margin = orders[amount].to_numpy('float64', na_value=np.nan) - cost
+        return pd.Series(margin, index=orders.index, name='Margin')
+
+    def units_sold(self, orders, ids=None, qty='Qty', sku='SKU'):
+        if ids is None:
+            ids = self.ids(orders[sku])
+        known = ids >= 0
+        units = orders[qty].to_numpy('float64', na_value=0)[known]
+        return np.bincount(ids[known], weights=units, minlength=self.n)
+
+    def stock_cover(self, orders, ids=None, date='Date', qty='Qty', sku='SKU'):
+        """Days of stock left per SKU at the average daily sales rate of `orders`."""
+        units = self.units_sold(orders, ids, qty, sku)
+        dates = orders[date].dropna()
+        days = (dates.max() - dates.min()).days + 1 if len(dates) else 0
+        daily = units / days if days else np.zeros(self.n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cover = np.where(daily > 0, self.stock / daily, np.inf)
+        cover[np.isnan(self.stock)] = np.nan
+        return pd.DataFrame({'Stock': self.stock, 'Units': units, 'DailyUnits': daily, 'CoverDays': cover},
+                            index=self.skus)
+
+    def price_gaps(self, base='Amazon MRP'):
+        """Each marketplace's MRP minus `base`, with the spread and cheapest marketplace."""
+        mrp = pd.DataFrame(self._mrp[:-1], index=self.skus, columns=MARKETPLACE_COLUMNS)
+        mrp = mrp.dropna(how='all')
+        gaps = mrp.sub(mrp[base], axis=0).drop(columns=base)
+        gaps['Spread'] = mrp.max(axis=1) - mrp.min(axis=1)
+        gaps['Cheapest'] = mrp.idxmin(axis=1)
+        return gaps
+
+
+def build_sku_dimension(catalogs, stock=None):
+    """SkuDimension from catalog frames (newest first) and a stock report frame."""
+    parts = []
+    for catalog in catalogs:
+        tp_col = next((c for c in TP_COLUMNS if c in catalog.columns), None)
+        part = pd.DataFrame({
+            'SKU': normalize_sku(catalog['Sku']),
+            'TP': _numeric(catalog[tp_col]) if tp_col else np.nan,
+        })
+        for col in MARKETPLACE_COLUMNS:
+            part[col] = _numeric(catalog[col]) if col in catalog.columns else np.nan
+        parts.append(part)
+    prices = (pd.concat(parts, ignore_index=True) if parts
+              else pd.DataFrame(columns=['SKU', 'TP', *MARKETPLACE_COLUMNS]))
+    prices = prices.dropna(subset=['SKU']).drop_duplicates('SKU', keep='first')
+
+    if stock is not None:
+        # The stock report lists some SKUs more than once (one row per colour/lot)
+        on_hand = _numeric(stock['Stock']).groupby(normalize_sku(stock['SKU Code'])).sum(min_count=1)
+    else:
+        on_hand = pd.Series(dtype='float64')
+
+    skus = pd.Index(prices['SKU']).union(on_hand.index, sort=False).unique()
+    prices = prices.set_index('SKU').reindex(skus)
+    return SkuDimension(
+        skus,
+        prices['TP'].to_numpy('float64'),
+        prices[MARKETPLACE_COLUMNS].to_numpy('float64'),
+        on_hand.reindex(skus).to_numpy('float64'),
+    )
+
+
+def load_sku_dimension(directory=data_dir):
+    catalogs = [load_cleaned(os.path.join(directory, f)) for f in CATALOG_FILES
+                if os.path.exists(os.path.join(directory, f))]
+    stock_path = os.path.join(directory, STOCK_FILE)
+    stock = load_cleaned(stock_path) if os.path.exists(stock_path) else None
+    return build_sku_dimension(catalogs, stock)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Margins, stock cover and marketplace price gaps by SKU.")
+    parser.add_argument('--data-dir', default=data_dir)
+    parser.add_argument('--sales', help=f"Cleaned sale report (default: {SALES_FILE} in --data-dir)")
+    args = parser.parse_args()
+
+    from data_loader import load_sales_data
+
+    dim = load_sku_dimension(args.data_dir)
+    orders = load_sales_data(args.sales or os.path.join(args.data_dir, SALES_FILE))
+    ids = dim.ids(orders['SKU'])
+    print(f"{dim.n:,} SKUs; {(ids >= 0).mean():.1%} of {len(orders):,} order rows matched")
+
+    margins = dim.order_margins(orders, ids)
+    print("\n--- Margin (Amount - TP x Qty) ---")
+    print(f"Total: {margins.sum():,.0f} over {margins.notna().sum():,} priced orders")
+
+    cover = dim.stock_cover(orders, ids)
+    print("\n--- Lowest stock cover (days) ---")
+    print(cover[cover['Units'] > 0].sort_values('CoverDays').head(10))
+
+    gaps = dim.price_gaps()
+    print("\n--- Widest marketplace price spreads ---")
+    print(gaps.sort_values('Spread', ascending=False).head(10))
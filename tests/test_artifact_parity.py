@@ -0,0 +1,62 @@
+"""Totals from the Parquet artifact match those from the cleaned CSV, to the cent."""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from clean_data import process_file
+from data_loader import load_sales_data, artifact_is_fresh, read_artifact, artifact_path
+from deep_dive_analysis import analyze
+from encoded_table import EncodedTable, AMOUNT_DECIMALS
+
+ROWS = 2000
+
+
+@pytest.fixture
+def raw_report(tmp_path):
+    rng = np.random.default_rng(16)
+    cents = rng.integers(100, 500_000, ROWS)
+    cents[:3] = [46464, 37653, 19999]  # 464.64 and 376.53 aren't exact in float32
+    raw = pd.DataFrame({
+        'index': np.arange(ROWS),
+        'Order ID': [f'40{i:07d}' for i in range(ROWS)],
+        'Date': pd.to_datetime('2022-03-31') + pd.to_timedelta(rng.integers(0, 91, ROWS), unit='D'),
+        'Status': rng.choice(['Shipped', 'Cancelled', 'Pending'], ROWS),
+        'Category': rng.choice(['Set', 'kurta', 'Saree', 'Top'], ROWS),
+        'Qty': rng.integers(1, 4, ROWS),
+        'Amount': [f'{c // 100}.{c % 100:02d}' for c in cents],
+        'ship-state': rng.choice(['KERALA', 'DELHI', 'BIHAR'], ROWS),
+        'fulfilled-by': rng.choice(['Easy Ship', ''], ROWS),
+    })
+    raw['Date'] = raw['Date'].dt.strftime('%m-%d-%y')
+    path = tmp_path / 'raw' / 'Amazon-Sale-Report.csv'
+    path.parent.mkdir()
+    raw.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('streamed', [False, True])
+def test_artifact_totals_match_csv(raw_report, tmp_path, streamed):
+    out_dir = tmp_path / 'cleaned'
+    out_dir.mkdir()
+    line, entry = process_file(str(raw_report), str(out_dir), chunksize=300,
+                               stream_threshold=0 if streamed else 1 << 40)
+    assert entry is not None, line
+    cleaned = str(out_dir / 'cleaned_Amazon-Sale-Report.csv')
+    assert artifact_is_fresh(cleaned)
+    assert read_artifact(artifact_path(cleaned))['Amount'].dtype == 'float64'
+
+    from_artifact = load_sales_data(cleaned)
+    from_csv = load_sales_data(cleaned, use_artifact=False)
+    assert from_artifact['Amount'].tolist() == from_csv['Amount'].tolist()
+    assert from_artifact['Amount'].iloc[0] == 464.64
+
+    tables = [EncodedTable.from_frame(df) for df in (from_artifact, from_csv)]
+    by_category = [table.sums_by('Category', table['Amount'], AMOUNT_DECIMALS) for table in tables]
+    pd.testing.assert_series_equal(by_category[0], by_category[1], check_exact=True)
+
+    reports = [analyze(df) for df in (from_artifact, from_csv)]
+    for key in ('monthly_sales', 'fulfillment_sales', 'status_counts', 'monthly_avg_price'):
+        pd.testing.assert_series_equal(reports[0][key], reports[1][key], check_exact=True,
+                                       check_categorical=False, check_index_type=False)
@@ -0,0 +1,177 @@
+"""The export API over a small in-memory sale report, with a temporary EXPORT_DIR."""
+import io
+import os
+import time
+import threading
+from types import SimpleNamespace
+
+import flask
+import pandas as pd
+import pytest
+
+from encoded_table import EncodedTable
+from exports import ExportService
+
+SALES = pd.DataFrame({
+    'Date': pd.to_datetime(['2022-04-01', '2022-04-02', '2022-05-03', '2022-05-04', '2022-06-05', '2022-06-06']),
+    'Amount': [100.50, 200.25, 50.00, 75.10, 300.00, 20.15],
+    'Qty': [1, 2, 1, 1, 3, 1],
+    'Category': ['Set', 'kurta', 'Set', 'Saree', 'kurta', 'Set'],
+    'ship-state': ['KERALA', 'DELHI', 'KERALA', 'BIHAR', 'DELHI', 'KERALA'],
+    'Month': ['2022-04', '2022-04', '2022-05', '2022-05', '2022-06', '2022-06'],
+    'Status': ['Shipped', 'Cancelled', 'Shipped', 'Shipped', 'Pending', 'Shipped'],
+    'fulfilled-by': ['Easy Ship', 'Unknown', 'Easy Ship', 'Unknown', 'Easy Ship', 'Easy Ship'],
+})
+DATASET = SimpleNamespace(version='v1', sales=EncodedTable.from_frame(SALES))
+
+
+def make_client(directory, **kwargs):
+    service = ExportService(lambda: DATASET, directory=str(directory), workers=1, **kwargs)
+    server = flask.Flask(__name__)
+    server.register_blueprint(service.blueprint())
+    return service, server.test_client()
+
+
+def wait_done(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f'/exports/{job_id}').get_json()
+        if job['status'] in ('done', 'failed') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    return tmp_path / 'exports'
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_rows_export(export_dir, fmt):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    service, client = make_client(export_dir, chunk_rows=2)
+    # Hold the one export thread so the job is still queued when the POST answers
+    gate = threading.Event()
+    service.pool.submit(gate.wait)
+    response = client.post('/exports', json={'kind': 'rows', 'format': fmt, 'categories': ['Set'],
+                                             'regions': ['KERALA', 'DELHI']})
+    gate.set()
+    assert response.status_code == 202
+    assert response.headers['Location'].endswith(f"/exports/{response.get_json()['id']}")
+
+    job = wait_done(client, response.get_json()['id'])
+    assert job['status'] == 'done', job['error']
+    assert job['rows'] == 3
+    assert job['filters'] == {'months': [], 'categories': ['Set'], 'regions': ['DELHI', 'KERALA']}
+
+    download = client.get(job['file'])
+    assert download.status_code == 200
+    body = io.BytesIO(download.data)
+    rows = pd.read_csv(body) if fmt == 'csv' else pd.read_parquet(body)
+    assert list(rows.columns) == list(SALES.columns)
+    assert rows['Amount'].tolist() == [100.50, 50.00, 20.15]
+    assert set(rows['Category'].astype(str)) == {'Set'}
+
+
+def test_report_export(export_dir):
+    _, client = make_client(export_dir, chunk_rows=4)
+    response = client.post('/exports', json={'kind': 'report', 'months': ['2022-04', '2022-05']})
+    job = wait_done(client, response.get_json()['id'])
+    assert job['status'] == 'done', job['error']
+    assert job['format'] == 'txt'
+    assert job['rows'] == 4
+
+    report = client.get(job['file']).get_data(as_text=True)
+    assert '--- Monthly Sales ---' in report
+    assert '300.75' in report  # April: 100.50 + 200.25
+    assert 'Cancellation Rate: 25.00%' in report
+
+
+def test_repeat_request_served_from_disk(export_dir):
+    _, client = make_client(export_dir)
+    first = wait_done(client, client.post('/exports', json={'regions': ['BIHAR']}).get_json()['id'])
+    assert first['status'] == 'done'
+
+    # A new service (as after a restart) finds the finished file in the same directory
+    _, client = make_client(export_dir)
+    response = client.post('/exports', json={'regions': ['BIHAR']})
+    assert response.status_code == 200
+    assert response.get_json()['id'] == first['id']
+    assert response.get_json()['status'] == 'done'
+    assert client.get(response.get_json()['file']).status_code == 200
+
+
+@pytest.mark.parametrize('spec', [
+    {'kind': 'chart'},
+    {'kind': 'rows', 'format': 'xlsx'},
+    {'kind': 'report', 'format': 'csv'},
+    {'months': '2022-04'},
+    {'categories': {'Set': True}},
+])
+def test_invalid_requests(export_dir, spec):
+    _, client = make_client(export_dir)
+    response = client.post('/exports', json=spec)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_unknown_export(export_dir):
+    _, client = make_client(export_dir)
+    assert client.get('/exports/0123456789abcdef0123').status_code == 404
+    assert client.get('/exports/0123456789abcdef0123/file').status_code == 404
+
+
+def test_prune_keeps_directory_within_max_bytes(export_dir):
+    os.makedirs(export_dir)
+    for i in range(5):
+        path = export_dir / f'{i}.csv'
+        path.write_bytes(b'x' * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+
+    service, _ = make_client(export_dir, max_bytes=250)
+    service.prune()
+    assert sorted(os.listdir(export_dir)) == ['3.csv', '4.csv']
+    assert sum(os.path.getsize(export_dir / name) for name in os.listdir(export_dir)) <= 250
+
+
+def age(service, job_id, seconds=10):
+    service.jobs[job_id].accessed -= seconds
+
+
+def test_finished_jobs_expire(export_dir):
+    service, client = make_client(export_dir, job_ttl=5)
+    job = wait_done(client, client.post('/exports', json={'regions': ['BIHAR']}).get_json()['id'])
+    service.prune()
+    assert job['id'] in service.jobs
+
+    age(service, job['id'])
+    service.prune()
+    assert service.jobs == {}
+    # The file outlives the job; asking again picks it up from disk
+    response = client.post('/exports', json={'regions': ['BIHAR']})
+    assert response.status_code == 200
+    assert response.get_json()['id'] == job['id']
+
+
+def test_prune_keeps_files_in_use(export_dir):
+    service, client = make_client(export_dir, max_bytes=0, job_ttl=5)
+    job = wait_done(client, client.post('/exports', json={'categories': ['Set']}).get_json()['id'])
+    path = export_dir / f"{job['id']}.csv"
+
+    # Still known to the service, though the file looks old
+    os.utime(path, (1000, 1000))
+    service.prune()
+    assert path.exists()
+
+    # Downloading marks it as recently used for every worker sharing the directory
+    assert client.get(job['file']).status_code == 200
+    age(service, job['id'])
+    service.prune()
+    assert job['id'] not in service.jobs
+    assert path.exists()
+
+    os.utime(path, (1000, 1000))
+    service.prune()
+    assert not path.exists()
+    assert client.get(f"/exports/{job['id']}").status_code == 404
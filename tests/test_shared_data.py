@@ -0,0 +1,50 @@
+"""Publishing the sale report encoded and attaching to it as memory-mapped arrays."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from encoded_table import EncodedTable
+from shared_data import publish, attach, current_version, META_FILE
+
+SALES = pd.DataFrame({
+    'Date': pd.to_datetime(['2022-04-01', '2022-04-02', None, '2022-05-04']),
+    'Amount': [464.64, 376.53, np.nan, 20.15],
+    'Qty': np.array([1, 2, 0, 1], dtype='int32'),
+    'Category': pd.Categorical(['Set', 'kurta', 'Set', None]),
+    'ship-state': ['KERALA', 'DELHI', None, 'BIHAR'],
+    'Month': ['2022-04', '2022-04', 'NaT', '2022-05'],
+})
+
+
+def test_attach_maps_the_encoded_arrays(tmp_path):
+    publish(SALES, str(tmp_path))
+    table = attach(str(tmp_path))
+    expected = EncodedTable.from_frame(SALES)
+
+    assert len(table) == len(expected)
+    assert list(table.columns) == list(expected.columns)
+    for name, array in expected.columns.items():
+        assert table[name].dtype == array.dtype
+        np.testing.assert_array_equal(table[name], array)
+        # Views of the memory map: nothing copied, nothing writable
+        assert not table[name].flags.owndata and not table[name].flags.writeable
+    assert table.lookups.keys() == expected.lookups.keys()
+    for name, lookup in expected.lookups.items():
+        assert table.lookups[name].dtype == object
+        assert table.lookups[name].tolist() == lookup.tolist()
+    assert table.sums_by('Category', table['Amount'], 2).to_dict() == {'Set': 464.64, 'kurta': 376.53}
+
+
+def test_attach_rejects_an_older_layout(tmp_path):
+    version_dir = publish(SALES, str(tmp_path))
+    meta_path = os.path.join(version_dir, META_FILE)
+    with open(meta_path) as f:
+        meta = json.load(f)
+    del meta['format']
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    with pytest.raises(ValueError):
+        attach(str(tmp_path), current_version(str(tmp_path)))